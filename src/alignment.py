@@ -1,134 +1,406 @@
 # alignment.py
-# Aligns Whisper word segments with Pyannote speaker turns using multiprocessing
+# Aligns Whisper word segments with Pyannote speaker turns using a sorted-array interval index
 
 import time
-import multiprocessing
 import logging
-from functools import partial
 import math
-from typing import Dict, List, Any, Tuple
-import traceback
-import bisect
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Union
+
+import numpy as np
 
 # Import config to get tuning parameters
 from . import config
+from . import alignment_numba
+
+@dataclass
+class WordRec:
+    """A transcribed word with its assigned speaker."""
+    # Declared by hand (rather than slots=True) to stay compatible with Python 3.8
+    __slots__ = ("start", "end", "text", "word_index", "speaker")
+    start: float
+    end: float
+    text: str
+    word_index: int
+    speaker: str
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Returns the word as a plain dictionary, e.g. for JSON responses."""
+        return {"start": self.start, "end": self.end, "text": self.text, "word_index": self.word_index, "speaker": self.speaker}
+
+
+@dataclass
+class SpeakerTurns:
+    """Speaker turns as parallel arrays (structure of arrays), sorted by start time."""
+    starts: np.ndarray    # float64 start times
+    ends: np.ndarray      # float64 end times
+    speakers: np.ndarray  # object array of speaker labels
+
+    @classmethod
+    def empty(cls) -> "SpeakerTurns":
+        return cls(np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64), np.empty(0, dtype=object))
+
+    @classmethod
+    def from_dicts(cls, speaker_turns: List[Dict[str, Any]]) -> "SpeakerTurns":
+        """Builds sorted arrays from a list of {"start", "end", "speaker"} dictionaries."""
+        ordered_turns = sorted(speaker_turns, key=lambda x: x['start'])
+        num_turns = len(ordered_turns)
+        return cls(
+            np.fromiter((turn['start'] for turn in ordered_turns), dtype=np.float64, count=num_turns),
+            np.fromiter((turn['end'] for turn in ordered_turns), dtype=np.float64, count=num_turns),
+            np.array([turn['speaker'] for turn in ordered_turns], dtype=object),
+        )
 
-def _find_speaker_for_word(word_info: Dict[str, Any], speaker_turns_tuple: Tuple[Dict[str, Any], ...]) -> Dict[str, Any]:
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def as_dicts(self) -> List[Dict[str, Any]]:
+        """Returns the turns as a list of {"start", "end", "speaker"} dictionaries."""
+        return [
+            {"start": start, "end": end, "speaker": speaker}
+            for start, end, speaker in zip(self.starts.tolist(), self.ends.tolist(), self.speakers.tolist())
+        ]
+
+
+class IntervalTree:
     """
-    Finds the speaker for a single word using binary search (bisect).
+    Sorted-array interval index over speaker turns.
+
+    Turns are kept as parallel NumPy arrays ordered by start time, with speakers stored
+    as integer ids into a small label table so lookups only touch numeric arrays. A running
+    maximum of the end times keeps the index searchable with np.searchsorted even when
+    turns overlap.
+    """
+
+    def __init__(self, speaker_turns: Union[SpeakerTurns, List[Dict[str, Any]]]):
+        if not isinstance(speaker_turns, SpeakerTurns):
+            speaker_turns = SpeakerTurns.from_dicts(speaker_turns)
+        self.starts = speaker_turns.starts
+        self.ends = speaker_turns.ends
+        self._max_ends = np.maximum.accumulate(self.ends) if len(speaker_turns) else self.ends
+        self.labels, self.speaker_ids = np.unique(speaker_turns.speakers, return_inverse=True)
+        self.speaker_ids = self.speaker_ids.astype(np.intp, copy=False)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def labels_for(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Maps speaker ids (-1 meaning no speaker) back to their labels.
+
+        Args:
+            ids (np.ndarray): Speaker ids as returned by the id-level queries.
+
+        Returns:
+            np.ndarray: Object array of speaker labels, "UNKNOWN" where no speaker was found.
+        """
+        assigned = np.full(len(ids), "UNKNOWN", dtype=object)
+        known = ids >= 0
+        assigned[known] = self.labels[ids[known]]
+        return assigned
+
+    def midpoint_ids(self, word_starts: np.ndarray, word_ends: np.ndarray) -> np.ndarray:
+        """
+        Finds the turn containing each word's midpoint in a single vectorized pass.
+
+        Args:
+            word_starts (np.ndarray): Start times of the words.
+            word_ends (np.ndarray): End times of the words.
+
+        Returns:
+            np.ndarray: Speaker id for each word, or -1 when no turn contains the midpoint.
+        """
+        assigned = np.full(len(word_starts), -1, dtype=np.intp)
+        num_turns = len(self)
+        if num_turns == 0 or len(word_starts) == 0:
+            return assigned
+
+        word_midpoints = 0.5 * (word_starts + word_ends)
+        turn_index = np.searchsorted(self.starts, word_midpoints, side='right') - 1
+
+        # Check the turn starting at or before the midpoint
+        clipped_index = np.clip(turn_index, 0, num_turns - 1)
+        in_turn = (turn_index >= 0) & (self.starts[clipped_index] <= word_midpoints) & (word_midpoints < self.ends[clipped_index])
+        assigned[in_turn] = self.speaker_ids[clipped_index[in_turn]]
+
+        # Fall back to the following turn, mirroring the original scalar lookup
+        next_index = turn_index + 1
+        clipped_next = np.clip(next_index, 0, num_turns - 1)
+        in_next_turn = ~in_turn & (next_index < num_turns) & \
+            (self.starts[clipped_next] <= word_midpoints) & (word_midpoints < self.ends[clipped_next])
+        assigned[in_next_turn] = self.speaker_ids[clipped_next[in_next_turn]]
+
+        return assigned
+
+    def query_ids(self, word_starts: np.ndarray, word_ends: np.ndarray) -> np.ndarray:
+        """
+        Finds the speaker id with the largest overlap for every word.
+
+        Candidate turns for all words are laid out in a flat CSR-style array so the
+        overlap durations can be computed and summed per speaker without a Python loop.
+        Words that overlap no turn (e.g. zero-length words) fall back to the midpoint lookup.
+
+        Args:
+            word_starts (np.ndarray): Start times of the words.
+            word_ends (np.ndarray): End times of the words.
+
+        Returns:
+            np.ndarray: Speaker id for each word, or -1 when no speaker was found.
+        """
+        assigned = self.midpoint_ids(word_starts, word_ends)
+        num_words = len(word_starts)
+        if len(self) == 0 or num_words == 0:
+            return assigned
+
+        # Turns before `lo` end before the word starts; turns from `hi` start after it ends
+        lo = np.searchsorted(self._max_ends, word_starts, side='right')
+        hi = np.maximum(np.searchsorted(self.starts, word_ends, side='left'), lo)
+        counts = hi - lo
+        total_candidates = int(counts.sum())
+        if total_candidates == 0:
+            return assigned
+
+        word_ids = np.repeat(np.arange(num_words), counts)
+        group_offsets = np.repeat(np.cumsum(counts) - counts, counts)
+        turn_ids = np.repeat(lo, counts) + (np.arange(total_candidates) - group_offsets)
+
+        overlaps = np.minimum(self.ends[turn_ids], word_ends[word_ids]) - np.maximum(self.starts[turn_ids], word_starts[word_ids])
+        np.clip(overlaps, 0.0, None, out=overlaps)
+
+        num_labels = len(self.labels)
+        overlap_per_speaker = np.bincount(
+            word_ids * num_labels + self.speaker_ids[turn_ids],
+            weights=overlaps,
+            minlength=num_words * num_labels,
+        ).reshape(num_words, num_labels)
+        best_label = overlap_per_speaker.argmax(axis=1)
+        has_overlap = overlap_per_speaker[np.arange(num_words), best_label] > 0
+        assigned[has_overlap] = best_label[has_overlap]
+
+        return assigned
+
+    def query_many(self, word_starts: np.ndarray, word_ends: np.ndarray) -> np.ndarray:
+        """
+        Finds the speaker label with the largest overlap for every word.
+
+        Args:
+            word_starts (np.ndarray): Start times of the words.
+            word_ends (np.ndarray): End times of the words.
+
+        Returns:
+            np.ndarray: Object array holding the assigned speaker label for each word.
+        """
+        return self.labels_for(self.query_ids(word_starts, word_ends))
+
+    def query(self, word_start: float, word_end: float) -> str:
+        """
+        Finds the speaker with the largest overlap for a single word.
+
+        Args:
+            word_start (float): Start time of the word.
+            word_end (float): End time of the word.
+
+        Returns:
+            str: The assigned speaker label, or "UNKNOWN".
+        """
+        return self.query_many(np.array([word_start], dtype=np.float64), np.array([word_end], dtype=np.float64))[0]
+
+
+def _align_in_threads(turn_index: IntervalTree, word_starts: np.ndarray, word_ends: np.ndarray) -> np.ndarray:
+    """
+    Aligns large word arrays by running the vectorized query over chunks in a thread pool.
+
+    NumPy releases the GIL inside its kernels, so threads scale without the fork and
+    pickling cost of a process pool. Workers only touch the numeric turn arrays and
+    write integer speaker ids into a pre-sized array as they complete, so no per-chunk
+    result lists are held and joined; labels are attached once after all chunks finish.
 
     Args:
-        word_info (Dict[str, Any]): Information about the word, including start and end times.
-        speaker_turns_tuple (Tuple[Dict[str, Any], ...]): Tuple of speaker turn dictionaries.
+        turn_index (IntervalTree): Index over the speaker turns.
+        word_starts (np.ndarray): Start times of the words.
+        word_ends (np.ndarray): End times of the words.
 
     Returns:
-        Dict[str, Any]: Updated word information with the assigned speaker.
+        np.ndarray: Object array holding the assigned speaker label for each word.
     """
-    word_start = word_info['start']
-    word_end = word_info['end']
-    word_midpoint = word_start + (word_end - word_start) / 2
-    speaker = "UNKNOWN"
+    total_words = len(word_starts)
 
-    if not speaker_turns_tuple:
-        word_info['speaker'] = speaker
-        return word_info
-
-    turn_start_times = [turn['start'] for turn in speaker_turns_tuple]
-    potential_turn_index = bisect.bisect_right(turn_start_times, word_midpoint) - 1
+    # Determine number of workers dynamically based on workload
+    target_chunk_size = config.ALIGNMENT_TARGET_WORDS_PER_CHUNK
+    max_workers = config.ALIGNMENT_MAX_WORKERS
 
-    if potential_turn_index >= 0 and \
-       speaker_turns_tuple[potential_turn_index]['start'] <= word_midpoint < speaker_turns_tuple[potential_turn_index]['end']:
-        speaker = speaker_turns_tuple[potential_turn_index]['speaker']
+    if total_words > 0 and target_chunk_size > 0:
+        # Calculate ideal number of chunks/workers based on target size
+        num_chunks_ideal = math.ceil(total_words / target_chunk_size)
+        # Use the minimum of ideal workers vs the configured max workers
+        num_workers = min(max_workers, num_chunks_ideal)
+        # Ensure we use at least 1 worker
+        num_workers = max(1, num_workers)
     else:
-        next_turn_index = potential_turn_index + 1
-        if next_turn_index < len(speaker_turns_tuple) and \
-           speaker_turns_tuple[next_turn_index]['start'] <= word_midpoint < speaker_turns_tuple[next_turn_index]['end']:
-            speaker = speaker_turns_tuple[next_turn_index]['speaker']
+        num_workers = 1  # Default to 1 worker if no words or invalid config
 
-    word_info['speaker'] = speaker
-    return word_info
+    # Calculate chunksize based on the actual number of workers, capped to bound per-chunk temporaries
+    chunksize = max(1, total_words // (num_workers + config.ALIGNMENT_CHUNK_FACTOR))
+    chunksize = min(chunksize, config.ALIGNMENT_MAX_CHUNKSIZE)
+
+    logging.info(f"Using {num_workers} worker threads (Max configured: {max_workers}) with chunksize {chunksize}.")
+
+    def align_chunk(start: int, stop: int) -> None:
+        # Each chunk writes its ids straight into its slice of the shared result array
+        speaker_ids[start:stop] = turn_index.query_ids(word_starts[start:stop], word_ends[start:stop])
+
+    speaker_ids = np.empty(total_words, dtype=np.intp)
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        futures = [
+            executor.submit(align_chunk, start, min(start + chunksize, total_words))
+            for start in range(0, total_words, chunksize)
+        ]
+        for future in as_completed(futures):
+            future.result()
+    return turn_index.labels_for(speaker_ids)
+
+
+def _as_speaker_turns(speaker_turns: Union[SpeakerTurns, List[Dict[str, Any]], None]) -> SpeakerTurns:
+    """Normalises the accepted speaker turn inputs to SpeakerTurns."""
+    if speaker_turns is None or len(speaker_turns) == 0:
+        logging.warning("Warning: No speaker turns provided...")
+        return SpeakerTurns.empty()
+    if not isinstance(speaker_turns, SpeakerTurns):
+        return SpeakerTurns.from_dicts(speaker_turns)
+    return speaker_turns
 
 
-def align_speech_and_speakers(segments: List[Any], speaker_turns: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def align_speech_and_speakers(segments: List[Any], speaker_turns: Union[SpeakerTurns, List[Dict[str, Any]]]) -> List[WordRec]:
     """
-    Aligns Whisper word segments with Pyannote speaker turns using multiprocessing.
+    Aligns Whisper word segments with Pyannote speaker turns, assigning each word
+    the speaker whose turns overlap it the most.
 
     Args:
         segments (List[Any]): List of Whisper word segments.
-        speaker_turns (List[Dict[str, Any]]): List of speaker turn dictionaries.
+        speaker_turns (Union[SpeakerTurns, List[Dict[str, Any]]]): Speaker turns, sorted
+            arrays or a list of speaker turn dictionaries.
 
     Returns:
-        List[Dict[str, Any]]: List of aligned word dictionaries with speaker information.
+        List[WordRec]: List of aligned words with speaker information.
     """
-    logging.info("Aligning transcript segments with speakers (Parallel CPU - Dynamic Workers)...")
+    logging.info("Aligning transcript segments with speakers (Vectorized max-overlap)...")
     start_alignment = time.time()
 
-    if not speaker_turns:
-        logging.warning("Warning: No speaker turns provided...")
-        speaker_turns = []
+    speaker_turns = _as_speaker_turns(speaker_turns)
+
+    # Prepare word data as parallel arrays, pre-sized so they are filled in a single pass
+    total_words = sum(1 for segment in segments for word in segment.words if word.word.strip())
+    if total_words == 0:
+        logging.warning("No words found to align.")
+        return []
+
+    logging.info(f"Total words to align: {total_words}")
 
-    # Prepare word data
-    words_to_process = []
+    word_starts = np.empty(total_words, dtype=np.float64)
+    word_ends = np.empty(total_words, dtype=np.float64)
+    word_texts: List[str] = [""] * total_words
     word_index = 0
     for segment in segments:
         for word in segment.words:
             word_text = word.word.strip()
             if not word_text:
                 continue
-            words_to_process.append({"start": word.start, "end": word.end, "text": word_text, "word_index": word_index})
+            word_starts[word_index] = word.start
+            word_ends[word_index] = word.end
+            word_texts[word_index] = word_text
             word_index += 1
 
-    if not words_to_process:
-        logging.warning("No words found to align.")
-        return []
+    unique_speakers = set(speaker_turns.speakers.tolist())
+    if len(unique_speakers) <= 1:
+        # Nothing to disambiguate: every word gets the sole speaker (UNKNOWN without turns)
+        sole_speaker = next(iter(unique_speakers), "UNKNOWN")
+        assigned_speakers = [sole_speaker] * total_words
+    else:
+        try:
+            turn_index = IntervalTree(speaker_turns)
+            if alignment_numba.NUMBA_AVAILABLE:
+                # Compiled kernel parallelises internally, so it replaces both NumPy paths
+                speaker_labels = turn_index.labels_for(alignment_numba.query_ids(turn_index, word_starts, word_ends))
+            elif total_words < config.ALIGNMENT_MP_THRESHOLD:
+                # Small inputs: a single in-process pass beats any thread/process start-up cost
+                speaker_labels = turn_index.query_many(word_starts, word_ends)
+            else:
+                speaker_labels = _align_in_threads(turn_index, word_starts, word_ends)
+        except Exception as e:
+            logging.error(f"Unexpected error during alignment: {e}")
+            return []
+        assigned_speakers = speaker_labels.tolist()
 
-    total_words = len(words_to_process)
-    logging.info(f"Total words to align: {total_words}")
+    aligned_words = [
+        WordRec(start, end, text, index, speaker)
+        for index, (start, end, text, speaker) in enumerate(
+            zip(word_starts.tolist(), word_ends.tolist(), word_texts, assigned_speakers)
+        )
+    ]
 
-    speaker_turns.sort(key=lambda x: x['start'])
-    speaker_turns_tuple = tuple(speaker_turns)
+    logging.info(f"Alignment complete in {time.time() - start_alignment:.2f} seconds.")
+    return aligned_words
 
-    # Determine number of workers dynamically based on workload
-    target_chunk_size = config.ALIGNMENT_TARGET_WORDS_PER_CHUNK
-    max_workers = config.ALIGNMENT_MAX_WORKERS
+def iter_aligned_words(segments: Iterable[Any], speaker_turns: Union[SpeakerTurns, List[Dict[str, Any]]],
+                       batch_words: Optional[int] = None) -> Iterator[WordRec]:
+    """
+    Streaming variant of align_speech_and_speakers.
 
-    if total_words > 0 and target_chunk_size > 0:
-        # Calculate ideal number of chunks/workers based on target size
-        num_chunks_ideal = math.ceil(total_words / target_chunk_size)
-        # Use the minimum of ideal workers vs the configured max workers
-        num_workers = min(max_workers, num_chunks_ideal)
-        # Ensure we use at least 1 worker
-        num_workers = max(1, num_workers)
-    else:
-        num_workers = 1  # Default to 1 worker if no words or invalid config
+    Words are pulled from `segments` (a list or faster-whisper's lazy generator) and
+    aligned in batches of about `batch_words`, so only one batch of words is held at a
+    time and each WordRec can be written out as soon as it is yielded. Speakers are
+    assigned with the same max-overlap rule.
 
-    # Calculate chunksize for pool.map based on the actual number of workers
-    chunk_factor = 4  # Aim for roughly 4 chunks per worker for load balancing
-    chunksize = max(1, math.ceil(total_words / (num_workers * chunk_factor))) if total_words > 0 else 1
+    Args:
+        segments (Iterable[Any]): Whisper segments with word timestamps.
+        speaker_turns (Union[SpeakerTurns, List[Dict[str, Any]]]): Speaker turns.
+        batch_words (Optional[int]): Words per vectorized query; defaults to
+            config.ALIGNMENT_TARGET_WORDS_PER_CHUNK.
 
-    logging.info(f"Using {num_workers} worker processes (Max configured: {max_workers}) with chunksize {chunksize}.")
+    Yields:
+        WordRec: Each non-empty word with its assigned speaker, in transcript order.
+    """
+    speaker_turns = _as_speaker_turns(speaker_turns)
+    batch_words = max(1, batch_words or config.ALIGNMENT_TARGET_WORDS_PER_CHUNK)
 
-    worker_func = partial(_find_speaker_for_word, speaker_turns_tuple=speaker_turns_tuple)
-    aligned_words_results = []
+    unique_speakers = set(speaker_turns.speakers.tolist())
+    turn_index = IntervalTree(speaker_turns) if len(unique_speakers) > 1 else None
+    sole_speaker = next(iter(unique_speakers), "UNKNOWN")
 
-    try:
-        with multiprocessing.Pool(processes=num_workers) as pool:
-            aligned_words_results = pool.map(worker_func, words_to_process, chunksize=chunksize)
-    except multiprocessing.TimeoutError as e:
-        logging.error(f"Multiprocessing timeout error during parallel alignment: {e}")
-        traceback.print_exc()
-        return []
-    except multiprocessing.AuthenticationError as e:
-        logging.error(f"Multiprocessing authentication error during parallel alignment: {e}")
-        traceback.print_exc()
-        return []
-    except Exception as e:
-        logging.error(f"Unexpected error during parallel alignment: {e}")
-        traceback.print_exc()
-        return []
+    starts: List[float] = []
+    ends: List[float] = []
+    texts: List[str] = []
+    first_index = 0
 
-    logging.info(f"Alignment complete in {time.time() - start_alignment:.2f} seconds.")
-    return aligned_words_results
+    def flush() -> Iterator[WordRec]:
+        if turn_index is None:
+            speakers = [sole_speaker] * len(texts)
+        else:
+            word_starts = np.array(starts, dtype=np.float64)
+            word_ends = np.array(ends, dtype=np.float64)
+            if alignment_numba.NUMBA_AVAILABLE:
+                speaker_ids = alignment_numba.query_ids(turn_index, word_starts, word_ends)
+            else:
+                speaker_ids = turn_index.query_ids(word_starts, word_ends)
+            speakers = turn_index.labels_for(speaker_ids).tolist()
+        for offset, (start, end, text, speaker) in enumerate(zip(starts, ends, texts, speakers)):
+            yield WordRec(start, end, text, first_index + offset, speaker)
+
+    for segment in segments:
+        for word in segment.words:
+            word_text = word.word.strip()
+            if not word_text:
+                continue
+            starts.append(word.start)
+            ends.append(word.end)
+            texts.append(word_text)
+        if len(texts) >= batch_words:
+            yield from flush()
+            first_index += len(texts)
+            starts, ends, texts = [], [], []
+    if texts:
+        yield from flush()
 
 # Add an alias for backward compatibility
-align_words_with_speakers = align_speech_and_speakers
\ No newline at end of file
+align_words_with_speakers = align_speech_and_speakers
@@ -0,0 +1,92 @@
+# alignment_numba.py
+# Numba-compiled kernel for the max-overlap speaker lookup used by alignment.py
+
+import numpy as np
+
+# Conditional import for Numba
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, parallel=True)
+    def _assign_speaker_ids(word_starts, word_ends, turn_starts, turn_ends, turn_max_ends, turn_speaker_ids, num_labels):
+        """
+        Assigns each word the speaker id with the largest summed overlap, falling back to
+        the turn containing the word midpoint (or the following turn), -1 if none.
+        """
+        num_words = word_starts.shape[0]
+        num_turns = turn_starts.shape[0]
+        out = np.empty(num_words, np.intp)
+        for i in prange(num_words):
+            word_start = word_starts[i]
+            word_end = word_ends[i]
+            assigned = -1
+
+            # Midpoint lookup: last turn starting at or before the midpoint, then the next one
+            midpoint = 0.5 * (word_start + word_end)
+            lo, hi = 0, num_turns
+            while lo < hi:
+                m = (lo + hi) >> 1
+                if turn_starts[m] <= midpoint:
+                    lo = m + 1
+                else:
+                    hi = m
+            k = lo - 1
+            if k >= 0 and turn_starts[k] <= midpoint and midpoint < turn_ends[k]:
+                assigned = turn_speaker_ids[k]
+            elif k + 1 < num_turns and turn_starts[k + 1] <= midpoint and midpoint < turn_ends[k + 1]:
+                assigned = turn_speaker_ids[k + 1]
+
+            # Candidate turns: the running max end must pass the word start,
+            # and the turn must start before the word ends
+            lo, hi = 0, num_turns
+            while lo < hi:
+                m = (lo + hi) >> 1
+                if turn_max_ends[m] <= word_start:
+                    lo = m + 1
+                else:
+                    hi = m
+            first = lo
+            overlap_per_speaker = np.zeros(num_labels, np.float64)
+            j = first
+            while j < num_turns and turn_starts[j] < word_end:
+                overlap = min(turn_ends[j], word_end) - max(turn_starts[j], word_start)
+                if overlap > 0.0:
+                    overlap_per_speaker[turn_speaker_ids[j]] += overlap
+                j += 1
+
+            if j > first:
+                best_label = np.argmax(overlap_per_speaker)
+                if overlap_per_speaker[best_label] > 0.0:
+                    assigned = best_label
+            out[i] = assigned
+        return out
+
+
+def query_ids(turn_index, word_starts: np.ndarray, word_ends: np.ndarray) -> np.ndarray:
+    """
+    Numba counterpart of IntervalTree.query_ids, returning identical speaker ids.
+
+    Args:
+        turn_index (IntervalTree): Index over the speaker turns.
+        word_starts (np.ndarray): Start times of the words.
+        word_ends (np.ndarray): End times of the words.
+
+    Returns:
+        np.ndarray: Speaker id for each word, or -1 when no speaker was found.
+    """
+    if not NUMBA_AVAILABLE:
+        raise ImportError("numba is not available; install it to use the compiled alignment kernel")
+    return _assign_speaker_ids(
+        np.ascontiguousarray(word_starts, dtype=np.float64),
+        np.ascontiguousarray(word_ends, dtype=np.float64),
+        turn_index.starts,
+        turn_index.ends,
+        turn_index._max_ends,
+        turn_index.speaker_ids,
+        len(turn_index.labels),
+    )
@@ -4,52 +4,79 @@ API endpoints for the transcribe_meeting package using FastAPI.
 This module provides asynchronous REST API endpoints for transcription services.
 """
 
-import os
 import uuid
+import asyncio
 import tempfile
-import logging
-import shutil
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Union
+from typing import AsyncIterator, Dict, Any
 
-from fastapi import FastAPI, File, UploadFile, BackgroundTasks, HTTPException
+import aiofiles
+from fastapi import FastAPI, File, UploadFile, BackgroundTasks, HTTPException, Depends
 from fastapi.responses import FileResponse
-from pydantic import BaseModel
 
-from . import audio_utils
-from . import transcriber
-from . import diarizer
-from . import alignment
-from . import output_utils
 from . import resource_manager
 from . import config
-from .core import process_video, cleanup_job_files
+from .core import JOB_EXECUTOR, DECODE_LIMITER, GPU_LIMITER, process_video, cleanup_job_files, preload_models, keep_whisper_warm
+from .job_store import BaseJobStore, TranscriptionJob, create_job_store
+
+async def keepalive(stop: asyncio.Event, interval: float) -> None:
+    """Warm the Whisper pipeline every `interval` seconds until `stop` is set."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            await loop.run_in_executor(None, keep_whisper_warm)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Load the shared models at startup and keep Whisper warm while the app is idle."""
+    if config.PRELOAD_MODELS:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(JOB_EXECUTOR, preload_models)
+    
+    stop_keepalive = asyncio.Event()
+    keepalive_task = None
+    if config.KEEPALIVE_INTERVAL_SECONDS > 0:
+        keepalive_task = asyncio.create_task(keepalive(stop_keepalive, config.KEEPALIVE_INTERVAL_SECONDS))
+    try:
+        yield
+    finally:
+        stop_keepalive.set()
+        if keepalive_task is not None:
+            await keepalive_task
+
 
 app = FastAPI(
     title="Transcribe Meeting API",
     description="API for transcribing and diarizing meeting recordings",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Directory to store temporary files
 TEMP_DIR = Path(tempfile.gettempdir()) / "transcribe_meeting"
 TEMP_DIR.mkdir(exist_ok=True)
 
+# Uploads are streamed to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
 # Storage for background job status
-jobs: Dict[str, Dict[str, Any]] = {}
+job_store = create_job_store(config.JOB_STORE_URL)
 
 
-class TranscriptionJob(BaseModel):
-    """Model for transcription job information."""
-    job_id: str
-    status: str  # "queued", "processing", "completed", "failed"
-    message: Optional[str] = None
-    output_file: Optional[str] = None
+def get_job_store() -> BaseJobStore:
+    """Dependency providing the configured job store."""
+    return job_store
 
 
 @app.post("/transcribe", response_model=TranscriptionJob)
 async def transcribe_video(
-    background_tasks: BackgroundTasks, file: UploadFile = File(...)
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    store: BaseJobStore = Depends(get_job_store),
 ) -> TranscriptionJob:
     """
     Upload a video file and start a transcription job.
@@ -57,6 +84,7 @@ async def transcribe_video(
     Args:
         background_tasks: FastAPI background tasks handler
         file: The uploaded video file
+        store: Job status store
         
     Returns:
         TranscriptionJob: Job status information
@@ -66,32 +94,34 @@ async def transcribe_video(
     job_dir = TEMP_DIR / job_id
     job_dir.mkdir(exist_ok=True)
     
-    # Save uploaded file
+    # Save uploaded file without blocking the event loop
     video_path = job_dir / file.filename
-    with open(video_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    async with aiofiles.open(video_path, "wb") as buffer:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            await buffer.write(chunk)
     
     # Create job record
-    jobs[job_id] = {
-        "job_id": job_id,
-        "status": "queued",
-        "message": "Job queued for processing",
-        "output_file": None
-    }
+    job = await store.set(
+        job_id,
+        status="queued",
+        message="Job queued for processing",
+        output_file=None
+    )
     
     # Process in background
-    background_tasks.add_task(process_video, job_id, video_path, jobs)
+    background_tasks.add_task(process_video, job_id, video_path, store)
     
-    return TranscriptionJob(**jobs[job_id])
+    return job
 
 
 @app.get("/jobs/{job_id}", response_model=TranscriptionJob)
-async def get_job_status(job_id: str) -> TranscriptionJob:
+async def get_job_status(job_id: str, store: BaseJobStore = Depends(get_job_store)) -> TranscriptionJob:
     """
     Get the status of a transcription job.
     
     Args:
         job_id: The job identifier
+        store: Job status store
         
     Returns:
         TranscriptionJob: Job status information
@@ -99,19 +129,21 @@ async def get_job_status(job_id: str) -> TranscriptionJob:
     Raises:
         HTTPException: If the job is not found
     """
-    if job_id not in jobs:
+    job = await store.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
     
-    return TranscriptionJob(**jobs[job_id])
+    return job
 
 
 @app.get("/jobs/{job_id}/download")
-async def download_transcript(job_id: str):
+async def download_transcript(job_id: str, store: BaseJobStore = Depends(get_job_store)):
     """
     Download the transcript for a completed job.
     
     Args:
         job_id: The job identifier
+        store: Job status store
         
     Returns:
         FileResponse: The transcript file
@@ -119,17 +151,17 @@ async def download_transcript(job_id: str):
     Raises:
         HTTPException: If the job is not found or not completed
     """
-    if job_id not in jobs:
+    job = await store.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
     
-    job = jobs[job_id]
-    if job["status"] != "completed" or not job["output_file"]:
+    if job.status != "completed" or not job.output_file:
         raise HTTPException(
             status_code=400, 
             detail=f"Job {job_id} is not completed or has no output file"
         )
     
-    output_file = Path(job["output_file"])
+    output_file = Path(job.output_file)
     if not output_file.exists():
         raise HTTPException(
             status_code=404, 
@@ -144,12 +176,13 @@ async def download_transcript(job_id: str):
 
 
 @app.delete("/jobs/{job_id}")
-async def delete_job(job_id: str) -> Dict[str, str]:
+async def delete_job(job_id: str, store: BaseJobStore = Depends(get_job_store)) -> Dict[str, str]:
     """
     Delete a job and its associated files.
     
     Args:
         job_id: The job identifier
+        store: Job status store
         
     Returns:
         Dict with a success message
@@ -157,28 +190,29 @@ async def delete_job(job_id: str) -> Dict[str, str]:
     Raises:
         HTTPException: If the job is not found
     """
-    if job_id not in jobs:
+    if await store.get(job_id) is None:
         raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
     
     # Clean up files
     cleanup_job_files(job_id)
     
-    # Remove job from dictionary
-    del jobs[job_id]
+    # Remove job from the store
+    await store.delete(job_id)
     
     return {"message": f"Job {job_id} deleted successfully"}
 
 
 @app.get("/health")
-async def health_check() -> Dict[str, str]:
+async def health_check() -> Dict[str, Any]:
     """
     Check API health status.
     
     Returns:
-        Dict with status information
+        Dict with status information and pipeline stage occupancy
     """
     return {
         "status": "healthy",
         "version": "0.1.0",
-        "cuda_available": "true" if resource_manager.check_gpu_availability() else "false"
+        "cuda_available": "true" if resource_manager.check_gpu_availability() else "false",
+        "stages": {"decode": DECODE_LIMITER.stats(), "gpu": GPU_LIMITER.stats()},
     }
\ No newline at end of file
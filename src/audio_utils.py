@@ -1,31 +1,118 @@
 # audio_utils.py
 import subprocess
 import os
+import shutil
 import logging
+import wave
+from collections import deque
+from typing import Any, Optional, Union
+
+import numpy as np
+
+# Sample rate expected by both Whisper and Pyannote
+SAMPLE_RATE = 16000
+
+# Resolve the ffmpeg binary once instead of searching PATH on every call
+FFMPEG = shutil.which("ffmpeg")
+
+# Quiet ffmpeg down to errors only and never let it wait on stdin
+_FFMPEG_QUIET_ARGS = ["-nostdin", "-hide_banner", "-loglevel", "error"]
+
+# Number of trailing ffmpeg stderr lines kept for error reporting
+_STDERR_TAIL_LINES = 100
+
+_FFMPEG_NOT_FOUND = "Error: ffmpeg command not found. Make sure ffmpeg is installed and in your system's PATH."
 
 def extract_audio(video_path: str, audio_output_path: str) -> bool:
     """ Extracts audio from video using ffmpeg. """
     logging.info(f"Extracting audio from {os.path.basename(video_path)}...")
+    if FFMPEG is None:
+        logging.error(_FFMPEG_NOT_FOUND)
+        return False
     ffmpeg_command = [
-        "ffmpeg",
-        "-i", video_path,
+        FFMPEG,
+        *_FFMPEG_QUIET_ARGS,
+        "-i", str(video_path),
         "-vn",  # No video
         "-acodec", "pcm_s16le", # Audio Codec WAV
-        "-ar", "16000", # Sample rate
+        "-ar", str(SAMPLE_RATE), # Sample rate
         "-y", # Overwrite output file if it exists
-        audio_output_path
+        str(audio_output_path)
     ]
     try:
-        process = subprocess.run(ffmpeg_command, check=True, capture_output=True, text=True)
+        # Stream stderr and keep only its tail rather than buffering the whole log
+        with subprocess.Popen(ffmpeg_command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                              text=True, errors="replace") as process:
+            stderr_tail = deque(process.stderr, maxlen=_STDERR_TAIL_LINES)
+            return_code = process.wait()
+        if return_code != 0:
+            logging.error(f"Error during FFmpeg execution: exit status {return_code}")
+            logging.error("FFmpeg stderr:\n" + "".join(stderr_tail))
+            return False
         logging.info("FFmpeg audio extraction successful.")
         return True
     except FileNotFoundError:
-         logging.error("Error: ffmpeg command not found. Make sure ffmpeg is installed and in your system's PATH.")
+         logging.error(_FFMPEG_NOT_FOUND)
          return False
+    except Exception as e:
+        logging.error(f"An unexpected error occurred during audio extraction: {e}")
+        return False
+
+def extract_audio_to_array(video_path: str) -> Optional[np.ndarray]:
+    """ Decodes the audio track of a video into memory as 16 kHz mono float32 samples, without writing a WAV file. """
+    logging.info(f"Extracting audio from {os.path.basename(video_path)} into memory...")
+    if FFMPEG is None:
+        logging.error(_FFMPEG_NOT_FOUND)
+        return None
+    ffmpeg_command = [
+        FFMPEG,
+        *_FFMPEG_QUIET_ARGS,
+        "-i", str(video_path),
+        "-vn",  # No video
+        "-f", "s16le",  # Raw PCM container
+        "-acodec", "pcm_s16le",
+        "-ar", str(SAMPLE_RATE),  # Sample rate
+        "-ac", "1",  # Mono
+        "pipe:1"
+    ]
+    try:
+        process = subprocess.run(ffmpeg_command, check=True, capture_output=True)
+        audio = np.frombuffer(process.stdout, dtype=np.int16).astype(np.float32)
+        audio /= 32768.0  # Normalize in place rather than allocating a second buffer
+        logging.info(f"FFmpeg audio extraction successful ({len(audio) / SAMPLE_RATE:.1f} seconds of audio).")
+        return audio
+    except FileNotFoundError:
+         logging.error(_FFMPEG_NOT_FOUND)
+         return None
     except subprocess.CalledProcessError as e:
         logging.error(f"Error during FFmpeg execution: {e}")
-        logging.error(f"FFmpeg stderr:\n{e.stderr}")
-        return False
+        logging.error(f"FFmpeg stderr:\n{e.stderr.decode('utf-8', errors='replace')}")
+        return None
     except Exception as e:
         logging.error(f"An unexpected error occurred during audio extraction: {e}")
-        return False
\ No newline at end of file
+        return None
+
+def load_wav_as_float32(wav_path: str) -> Optional[np.ndarray]:
+    """ Reads a 16 kHz PCM16 WAV written by extract_audio into mono float32 samples, so models skip their own decode. """
+    logging.info(f"Loading {os.path.basename(wav_path)} into memory...")
+    try:
+        with wave.open(str(wav_path), "rb") as wav_file:
+            if wav_file.getframerate() != SAMPLE_RATE or wav_file.getsampwidth() != 2:
+                logging.error(f"Unexpected WAV format in {wav_path}: "
+                              f"{wav_file.getframerate()} Hz, {8 * wav_file.getsampwidth()}-bit")
+                return None
+            channels = wav_file.getnchannels()
+            frames = wav_file.readframes(wav_file.getnframes())
+        audio = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+        if channels > 1:
+            audio = audio.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+        return audio
+    except Exception as e:
+        logging.error(f"Error loading audio file {wav_path}: {e}")
+        return None
+
+def describe_audio(audio: Union[str, os.PathLike, np.ndarray, Any]) -> str:
+    """ Returns a short human-readable description of an audio path or in-memory buffer/tensor for log messages. """
+    if hasattr(audio, "shape"):
+        return f"in-memory audio ({audio.shape[-1] / SAMPLE_RATE:.1f}s)"
+    return os.path.basename(audio)
@@ -12,7 +12,7 @@ from typing import Dict, Any, Optional, Union, Literal
 import torch
 
 # Define types
-ComputeType = Literal["float16", "float32", "int8"]
+ComputeType = Literal["float16", "float32", "int8", "int8_float16", "int8_bfloat16"]
 DeviceType = Literal["cuda", "cpu"]
 
 # Base configuration with defaults
@@ -23,23 +23,41 @@ DEFAULT_CONFIG = {
     "PROCESSED_VIDEO_DIR": "processed",
     
     # Whisper model configuration
-    "WHISPER_MODEL_SIZE": "large",  # tiny, base, small, medium, large
+    "WHISPER_MODEL_SIZE": "large-v3-turbo",  # tiny, base, small, medium, large, large-v3, distil-large-v3, large-v3-turbo
     "WHISPER_DEVICE": "cuda" if torch.cuda.is_available() else "cpu",
-    "WHISPER_COMPUTE_TYPE": "int8",  # float16, float32, int8
+    "WHISPER_COMPUTE_TYPE": "int8_float16" if torch.cuda.is_available() else "int8",  # float16, float32, int8, int8_float16, int8_bfloat16
     "WHISPER_BATCH_SIZE": 16,       # Batch size for inference
     "WHISPER_BEAM_SIZE": 5,         # Beam size for inference
+    "WHISPER_VAD_THRESHOLD": 0.5,   # Silero VAD speech probability threshold
+    "WHISPER_VAD_BATCH_SIZE": 16,   # VAD windows scored per call, on faster-whisper versions that support it
+    "WHISPER_BATCHED_MIN_DURATION_S": 30,  # In-memory clips shorter than this skip batching and VAD; 0 disables
+    "WHISPER_QUANTIZE": True,       # Load float16/float32 models with INT8 weights
+    "WHISPER_CPU_THREADS": 0,       # CTranslate2 threads per worker; 0 = physical cores / workers
+    "WHISPER_NUM_WORKERS": 1,       # CTranslate2 workers, i.e. transcriptions that can run in parallel
     
     # Diarization configuration
-    "DIARIZATION_PIPELINE_NAME": "pyannote/speaker-diarization@2.1",
+    "DIARIZATION_PIPELINE_NAME": "pyannote/speaker-diarization-3.1",
     "HUGGINGFACE_AUTH_TOKEN": os.environ.get("HUGGINGFACE_AUTH_TOKEN", ""),
+    "DIARIZATION_MERGE_GAP_SECONDS": 0.1,  # Merge same-speaker turns separated by less than this
     
     # Resource management
     "GPU_MEMORY_THRESHOLD_MB": 2000,  # Minimum required GPU memory in MB
     "CPU_THREADS": os.cpu_count() or 4,  # Default to available cores or 4
     
+    # API configuration
+    "JOB_STORE_URL": "",  # Redis URL for sharing job state across API workers; empty for in-memory
+    "MAX_CONCURRENT_JOBS": 2,  # Jobs in flight per API process; GPU stages are further limited below
+    "GPU_CONCURRENCY": 1,  # Jobs allowed in the GPU stage (diarization + transcription) at once
+    "DECODE_CONCURRENCY": max(1, (os.cpu_count() or 4) // 2),  # Jobs allowed to run FFmpeg decoding at once
+    "PRELOAD_MODELS": True,  # Load the models when the API starts instead of on the first job
+    "KEEPALIVE_INTERVAL_SECONDS": 240,  # Run a tiny warm-up transcription this often while idle; 0 disables
+    
     # Alignment configuration
     "ALIGNMENT_MAX_WORKERS": max(1, (os.cpu_count() or 4) - 1),  # Keep one CPU core free
     "ALIGNMENT_TARGET_WORDS_PER_CHUNK": 500,  # Target words per chunk for parallel alignment
+    "ALIGNMENT_CHUNK_FACTOR": 2,  # Extra chunks beyond one per worker, for load balancing
+    "ALIGNMENT_MAX_CHUNKSIZE": 2000,  # Upper bound on words per parallel alignment chunk
+    "ALIGNMENT_MP_THRESHOLD": 50000,  # Below this many words, align in a single in-process pass
 }
 
 # Configuration loaded from environment will be stored here
@@ -59,7 +77,7 @@ def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
         ValueError: If a configuration value is invalid
     """
     # Validate WHISPER_MODEL_SIZE
-    valid_model_sizes = ["tiny", "base", "small", "medium", "large"]
+    valid_model_sizes = ["tiny", "base", "small", "medium", "large", "large-v3", "distil-large-v3", "large-v3-turbo", "turbo"]
     if config["WHISPER_MODEL_SIZE"] not in valid_model_sizes:
         raise ValueError(f"WHISPER_MODEL_SIZE must be one of {valid_model_sizes}")
     
@@ -69,7 +87,7 @@ def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
         raise ValueError(f"WHISPER_DEVICE must be one of {valid_devices}")
     
     # Validate WHISPER_COMPUTE_TYPE
-    valid_compute_types = ["float16", "float32", "int8"]
+    valid_compute_types = ["float16", "float32", "int8", "int8_float16", "int8_bfloat16"]
     if config["WHISPER_COMPUTE_TYPE"] not in valid_compute_types:
         raise ValueError(f"WHISPER_COMPUTE_TYPE must be one of {valid_compute_types}")
     
@@ -77,12 +95,31 @@ def _validate_config(config: Dict[str, Any]) -> Dict[str, Any]:
     config["REPO_ROOT"] = Path(config["REPO_ROOT"])
     
     # Convert numeric values
+    config["DIARIZATION_MERGE_GAP_SECONDS"] = float(config["DIARIZATION_MERGE_GAP_SECONDS"])
     config["GPU_MEMORY_THRESHOLD_MB"] = int(config["GPU_MEMORY_THRESHOLD_MB"])
     config["CPU_THREADS"] = int(config["CPU_THREADS"])
     config["WHISPER_BATCH_SIZE"] = int(config["WHISPER_BATCH_SIZE"])
     config["WHISPER_BEAM_SIZE"] = int(config["WHISPER_BEAM_SIZE"])
+    config["WHISPER_VAD_THRESHOLD"] = float(config["WHISPER_VAD_THRESHOLD"])
+    if not 0.0 < config["WHISPER_VAD_THRESHOLD"] < 1.0:
+        raise ValueError("WHISPER_VAD_THRESHOLD must be between 0 and 1")
+    config["WHISPER_VAD_BATCH_SIZE"] = int(config["WHISPER_VAD_BATCH_SIZE"])
+    if config["WHISPER_VAD_BATCH_SIZE"] < 1:
+        raise ValueError("WHISPER_VAD_BATCH_SIZE must be at least 1")
+    config["WHISPER_BATCHED_MIN_DURATION_S"] = max(0.0, float(config["WHISPER_BATCHED_MIN_DURATION_S"]))
+    config["WHISPER_QUANTIZE"] = str(config["WHISPER_QUANTIZE"]).lower() in ("1", "true", "yes")
+    config["WHISPER_CPU_THREADS"] = max(0, int(config["WHISPER_CPU_THREADS"]))
+    config["WHISPER_NUM_WORKERS"] = max(1, int(config["WHISPER_NUM_WORKERS"]))
+    config["MAX_CONCURRENT_JOBS"] = max(1, int(config["MAX_CONCURRENT_JOBS"]))
+    config["GPU_CONCURRENCY"] = max(1, int(config["GPU_CONCURRENCY"]))
+    config["DECODE_CONCURRENCY"] = max(1, int(config["DECODE_CONCURRENCY"]))
+    config["PRELOAD_MODELS"] = str(config["PRELOAD_MODELS"]).lower() in ("1", "true", "yes")
+    config["KEEPALIVE_INTERVAL_SECONDS"] = max(0.0, float(config["KEEPALIVE_INTERVAL_SECONDS"]))
     config["ALIGNMENT_MAX_WORKERS"] = int(config["ALIGNMENT_MAX_WORKERS"])
     config["ALIGNMENT_TARGET_WORDS_PER_CHUNK"] = int(config["ALIGNMENT_TARGET_WORDS_PER_CHUNK"])
+    config["ALIGNMENT_CHUNK_FACTOR"] = max(0, int(config["ALIGNMENT_CHUNK_FACTOR"]))
+    config["ALIGNMENT_MAX_CHUNKSIZE"] = max(1, int(config["ALIGNMENT_MAX_CHUNKSIZE"]))
+    config["ALIGNMENT_MP_THRESHOLD"] = int(config["ALIGNMENT_MP_THRESHOLD"])
     
     return config
 
@@ -140,9 +177,25 @@ WHISPER_DEVICE = _loaded_config["WHISPER_DEVICE"]
 WHISPER_COMPUTE_TYPE = _loaded_config["WHISPER_COMPUTE_TYPE"]
 WHISPER_BATCH_SIZE = _loaded_config["WHISPER_BATCH_SIZE"]
 WHISPER_BEAM_SIZE = _loaded_config["WHISPER_BEAM_SIZE"]
+WHISPER_VAD_THRESHOLD = _loaded_config["WHISPER_VAD_THRESHOLD"]
+WHISPER_VAD_BATCH_SIZE = _loaded_config["WHISPER_VAD_BATCH_SIZE"]
+WHISPER_BATCHED_MIN_DURATION_S = _loaded_config["WHISPER_BATCHED_MIN_DURATION_S"]
+WHISPER_QUANTIZE = _loaded_config["WHISPER_QUANTIZE"]
+WHISPER_CPU_THREADS = _loaded_config["WHISPER_CPU_THREADS"]
+WHISPER_NUM_WORKERS = _loaded_config["WHISPER_NUM_WORKERS"]
 DIARIZATION_PIPELINE_NAME = _loaded_config["DIARIZATION_PIPELINE_NAME"]
+JOB_STORE_URL = _loaded_config["JOB_STORE_URL"]
+MAX_CONCURRENT_JOBS = _loaded_config["MAX_CONCURRENT_JOBS"]
+GPU_CONCURRENCY = _loaded_config["GPU_CONCURRENCY"]
+DECODE_CONCURRENCY = _loaded_config["DECODE_CONCURRENCY"]
+PRELOAD_MODELS = _loaded_config["PRELOAD_MODELS"]
+KEEPALIVE_INTERVAL_SECONDS = _loaded_config["KEEPALIVE_INTERVAL_SECONDS"]
 HUGGINGFACE_AUTH_TOKEN = _loaded_config["HUGGINGFACE_AUTH_TOKEN"]
+DIARIZATION_MERGE_GAP_SECONDS = _loaded_config["DIARIZATION_MERGE_GAP_SECONDS"]
 GPU_MEMORY_THRESHOLD_MB = _loaded_config["GPU_MEMORY_THRESHOLD_MB"]
 CPU_THREADS = _loaded_config["CPU_THREADS"]
 ALIGNMENT_MAX_WORKERS = _loaded_config["ALIGNMENT_MAX_WORKERS"]
-ALIGNMENT_TARGET_WORDS_PER_CHUNK = _loaded_config["ALIGNMENT_TARGET_WORDS_PER_CHUNK"]
\ No newline at end of file
+ALIGNMENT_TARGET_WORDS_PER_CHUNK = _loaded_config["ALIGNMENT_TARGET_WORDS_PER_CHUNK"]
+ALIGNMENT_CHUNK_FACTOR = _loaded_config["ALIGNMENT_CHUNK_FACTOR"]
+ALIGNMENT_MAX_CHUNKSIZE = _loaded_config["ALIGNMENT_MAX_CHUNKSIZE"]
+ALIGNMENT_MP_THRESHOLD = _loaded_config["ALIGNMENT_MP_THRESHOLD"]
\ No newline at end of file
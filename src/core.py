@@ -1,10 +1,16 @@
 # Core logic for transcribing meetings
 
+import asyncio
+import functools
 import logging
 import shutil
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+
+import torch
 
 from . import audio_utils
 from . import transcriber
@@ -13,10 +19,187 @@ from . import alignment
 from . import output_utils
 from . import resource_manager
 from . import config
+from .job_store import BaseJobStore
 
 TEMP_DIR = Path(tempfile.gettempdir()) / "transcribe_meeting"
 TEMP_DIR.mkdir(exist_ok=True)
 
+# Jobs run the blocking model code on worker threads so the API event loop stays
+# responsive; threads (not processes) keep a single shared CUDA context.
+JOB_EXECUTOR = ThreadPoolExecutor(max_workers=config.MAX_CONCURRENT_JOBS, thread_name_prefix="transcribe-job")
+
+class StageLimiter:
+    """
+    Bounded semaphore for one pipeline stage that also reports its occupancy.
+    
+    Used as a context manager around the stage; blocks while `limit` jobs are inside.
+    """
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self._in_use = 0
+    
+    def acquire(self, blocking: bool = True) -> bool:
+        """Takes a slot; with blocking=False, returns False at once if none is free."""
+        if not self._semaphore.acquire(blocking):
+            return False
+        with self._lock:
+            self._in_use += 1
+        return True
+    
+    def release(self) -> None:
+        with self._lock:
+            self._in_use -= 1
+        self._semaphore.release()
+    
+    def __enter__(self) -> "StageLimiter":
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.release()
+    
+    def stats(self) -> Dict[str, int]:
+        """Slots in use and the configured limit, for health reporting."""
+        with self._lock:
+            return {"in_use": self._in_use, "limit": self.limit}
+
+# A job decodes its audio under DECODE_LIMITER and holds GPU_LIMITER only while the
+# models run, so another job's FFmpeg decode overlaps this job's GPU work
+DECODE_LIMITER = StageLimiter(config.DECODE_CONCURRENCY)
+GPU_LIMITER = StageLimiter(config.GPU_CONCURRENCY)
+
+# Each job decodes its transcript here while diarization runs on the job thread
+TRANSCRIPTION_EXECUTOR = ThreadPoolExecutor(max_workers=config.MAX_CONCURRENT_JOBS, thread_name_prefix="transcribe-whisper")
+
+# Models are loaded once per process and shared by every job; the lock keeps
+# concurrent first requests from loading the same model twice.
+_MODEL_LOCK = threading.Lock()
+
+# Device the shared models live on. It is chosen once: select_device() ranks GPUs by
+# free memory, which our own loaded models consume, so asking again per job could
+# pick a different device and force a reload.
+_model_device: Optional[str] = None
+
+def _get_model_device_locked() -> str:
+    """Returns the shared model device, selecting it on first use. Caller holds _MODEL_LOCK."""
+    global _model_device
+    if _model_device is None:
+        _model_device = resource_manager.select_device()
+        logging.info(f"Shared models will run on {_model_device}")
+    return _model_device
+
+def get_model_device() -> str:
+    """
+    Get the device the shared models are (or will be) loaded on.
+    
+    Jobs upload their waveforms here so tensors and weights share a device.
+    """
+    with _MODEL_LOCK:
+        return _get_model_device_locked()
+
+@functools.lru_cache(maxsize=1)
+def _load_whisper_pipeline_cached(model_size: str, compute_type: str) -> Any:
+    device = _get_model_device_locked()
+    model = transcriber.load_whisper_model(model_size, device, compute_type, quantize=config.WHISPER_QUANTIZE)
+    if model is None:
+        # Raising keeps the failure out of the cache so the next job retries
+        raise RuntimeError("Failed to load Whisper model")
+    return transcriber.create_batched_pipeline(model)
+
+@functools.lru_cache(maxsize=1)
+def _load_diarization_pipeline_cached(pipeline_name: str, auth_token: str) -> Any:
+    pipeline = diarizer.load_diarization_pipeline(pipeline_name, auth_token, _get_model_device_locked())
+    if pipeline is None:
+        raise RuntimeError("Failed to load diarization pipeline")
+    return pipeline
+
+def get_whisper_pipeline(model_size: str, compute_type: str) -> Any:
+    """
+    Get the shared batched Whisper pipeline, loading the model on first use.
+    
+    The model is loaded on get_model_device().
+    
+    Args:
+        model_size: Whisper model size
+        compute_type: CTranslate2 compute type
+        
+    Returns:
+        The BatchedInferencePipeline wrapping the loaded WhisperModel
+        
+    Raises:
+        RuntimeError: If the model cannot be loaded
+    """
+    with _MODEL_LOCK:
+        return _load_whisper_pipeline_cached(model_size, compute_type)
+
+def get_diarization_pipeline(pipeline_name: str, auth_token: str) -> Any:
+    """
+    Get the shared diarization pipeline, loading it on first use.
+    
+    The pipeline is loaded on get_model_device().
+    
+    Args:
+        pipeline_name: pyannote pipeline name
+        auth_token: Hugging Face auth token
+        
+    Returns:
+        The loaded pyannote Pipeline
+        
+    Raises:
+        RuntimeError: If the pipeline cannot be loaded
+    """
+    with _MODEL_LOCK:
+        return _load_diarization_pipeline_cached(pipeline_name, auth_token)
+
+def preload_models() -> bool:
+    """
+    Load the shared models up front so the first job doesn't pay for it.
+    
+    Returns:
+        True if both models are loaded, False otherwise (jobs will retry the load)
+    """
+    try:
+        get_whisper_pipeline(config.WHISPER_MODEL_SIZE, config.WHISPER_COMPUTE_TYPE)
+        get_diarization_pipeline(config.DIARIZATION_PIPELINE_NAME, config.HUGGINGFACE_AUTH_TOKEN)
+        return True
+    except Exception as e:
+        logging.warning(f"Could not preload models, they will be loaded by the first job: {e}")
+        return False
+
+def keep_whisper_warm() -> bool:
+    """
+    Run a warm-up transcription on the shared Whisper pipeline if it is idle.
+    
+    Skipped when the model isn't loaded yet or a job holds the GPU stage, since
+    a running job keeps the pipeline warm anyway.
+    
+    Returns:
+        True if a warm-up ran, False if it was skipped or failed
+    """
+    if _load_whisper_pipeline_cached.cache_info().currsize == 0:
+        return False
+    if not GPU_LIMITER.acquire(blocking=False):
+        return False
+    try:
+        whisper_pipeline = get_whisper_pipeline(config.WHISPER_MODEL_SIZE, config.WHISPER_COMPUTE_TYPE)
+        return transcriber.warm_up(whisper_pipeline)
+    except Exception as e:
+        logging.warning(f"Skipping Whisper warm-up: {e}")
+        return False
+    finally:
+        GPU_LIMITER.release()
+
+def clear_model_cache() -> None:
+    """Drop the shared models so the next job selects a device and loads them again."""
+    global _model_device
+    with _MODEL_LOCK:
+        _load_whisper_pipeline_cached.cache_clear()
+        _load_diarization_pipeline_cached.cache_clear()
+        _model_device = None
+    resource_manager.cleanup_gpu_memory()
+
 def cleanup_job_files(job_id: str) -> None:
     """
     Clean up temporary files for a completed job.
@@ -32,79 +215,106 @@ def cleanup_job_files(job_id: str) -> None:
         except Exception as e:
             logging.error(f"Error cleaning up job directory {job_dir}: {e}")
 
-async def process_video(job_id: str, video_path: Path, jobs: Dict[str, Dict[str, Any]]) -> None:
+def transcribe_job(job_id: str, video_path: Path) -> Path:
     """
-    Process the video file asynchronously in the background.
+    Run the blocking transcription pipeline for a job.
     
     Args:
         job_id: The job identifier 
         video_path: Path to the video file
-        jobs: Dictionary to store job status and metadata
+        
+    Returns:
+        Path to the written transcript
+        
+    Raises:
+        RuntimeError: If any pipeline stage fails
     """
-    jobs[job_id]["status"] = "processing"
-    jobs[job_id]["message"] = "Processing started"
-    
     job_dir = TEMP_DIR / job_id
     job_dir.mkdir(exist_ok=True)
     
-    audio_path = job_dir / "audio.wav"
     output_path = job_dir / "transcript.txt"
     
     try:
-        # Extract audio
-        if not audio_utils.extract_audio(video_path, audio_path):
+        # Decode audio once into memory; both models consume the same buffer
+        with DECODE_LIMITER:
+            audio = audio_utils.extract_audio_to_array(video_path)
+        if audio is None:
             raise RuntimeError("Failed to extract audio from video")
         
-        # Load models
-        device = resource_manager.select_device()
-        
-        # Use Whisper model
-        with transcriber.ModelManager(
-            config.WHISPER_MODEL_SIZE, 
-            device,
-            config.WHISPER_COMPUTE_TYPE
-        ) as whisper_model:
-            if whisper_model is None:
-                raise RuntimeError("Failed to load Whisper model")
-                
-            # Load diarization pipeline
-            diarization_pipeline = diarizer.load_diarization_pipeline(
+        with GPU_LIMITER:
+            # Load models (cached across jobs, on the device chosen at first load)
+            whisper_pipeline = get_whisper_pipeline(
+                config.WHISPER_MODEL_SIZE, 
+                config.WHISPER_COMPUTE_TYPE
+            )
+            diarization_pipeline = get_diarization_pipeline(
                 config.DIARIZATION_PIPELINE_NAME, 
                 config.HUGGINGFACE_AUTH_TOKEN
             )
-            if diarization_pipeline is None:
-                raise RuntimeError("Failed to load diarization pipeline")
-                
-            # Run diarization
-            diarization_result = diarizer.run_diarization(diarization_pipeline, audio_path)
-            if diarization_result is None:
-                raise RuntimeError("Diarization failed")
+            device = get_model_device()
                 
-            speaker_turns = diarizer.extract_speaker_turns(diarization_result)
-            
-            # Run transcription
-            raw_segments, _ = transcriber.run_transcription(whisper_model, audio_path)
-            if raw_segments is None:
-                raise RuntimeError("Transcription failed")
-                
-            segments_list = list(raw_segments)
-            
-            # Align speakers with words
-            aligned_words = alignment.align_words_with_speakers(segments_list, speaker_turns)
-            
-            # Save transcript
-            output_utils.save_transcript_with_speakers(aligned_words, output_path)
+            # Start transcription first (CTranslate2 reads the host-side NumPy buffer) so it
+            # overlaps diarization; per-file time drops to roughly the slower of the two
+            segments_future = TRANSCRIPTION_EXECUTOR.submit(transcriber.transcribe_segments, whisper_pipeline, audio)
+            try:
+                # Upload the samples once; pyannote consumes the tensor directly on the device
+                waveform = torch.from_numpy(audio).unsqueeze(0)
+                if device.startswith("cuda"):
+                    waveform = waveform.to(device, non_blocking=True)
+
+                # Run diarization
+                diarization_result = diarizer.run_diarization(diarization_pipeline, waveform)
+                del waveform
+            finally:
+                # Always wait for the transcription thread, even if the upload or diarization
+                # raised, so Whisper never runs on the GPU after GPU_LIMITER is released
+                segments_list = segments_future.result()
+        if diarization_result is None:
+            raise RuntimeError("Diarization failed")
+        if segments_list is None:
+            raise RuntimeError("Transcription failed")
             
-            # Update job status
-            jobs[job_id]["status"] = "completed"
-            jobs[job_id]["message"] = "Processing completed successfully"
-            jobs[job_id]["output_file"] = str(output_path)
+        speaker_turns = diarizer.extract_speaker_turn_arrays(diarization_result)
+        
+        # Align speakers with words
+        # Stream aligned words straight into the writer instead of building the full list
+        aligned_words = alignment.iter_aligned_words(segments_list, speaker_turns)
+        
+        # Save transcript
+        if not output_utils.save_transcript_with_speakers(aligned_words, output_path):
+            raise RuntimeError("Failed to save transcript")
+        
+        return output_path
+        
+    finally:
+        # Release intermediate tensors; the cached models stay loaded
+        resource_manager.cleanup_gpu_memory()
+
+async def process_video(job_id: str, video_path: Path, store: BaseJobStore) -> None:
+    """
+    Process the video file in the background without blocking the event loop.
+    
+    The pipeline itself runs on JOB_EXECUTOR; only job status updates happen here.
+    
+    Args:
+        job_id: The job identifier 
+        video_path: Path to the video file
+        store: Job store holding job status and metadata
+    """
+    await store.set(job_id, status="processing", message="Processing started")
+    
+    try:
+        loop = asyncio.get_running_loop()
+        output_path = await loop.run_in_executor(JOB_EXECUTOR, transcribe_job, job_id, video_path)
+        
+        # Update job status
+        await store.set(
+            job_id,
+            status="completed",
+            message="Processing completed successfully",
+            output_file=str(output_path)
+        )
             
     except Exception as e:
         logging.exception(f"Error processing job {job_id}: {e}")
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["message"] = f"Processing failed: {str(e)}"
-        
-    finally:
-        # Clean up resources
-        resource_manager.cleanup_gpu_memory()
\ No newline at end of file
+        await store.set(job_id, status="failed", message=f"Processing failed: {str(e)}")
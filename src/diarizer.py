@@ -7,7 +7,13 @@ import platform
 from pathlib import Path
 from pyannote.audio import Pipeline
 import logging
-from typing import Optional, Any, List, Dict
+from typing import Optional, Any, List, Dict, Union
+
+import numpy as np
+
+from . import audio_utils
+from . import config
+from .alignment import SpeakerTurns
 
 # Set environment variable to disable symlinks warning and use direct copies instead
 os.environ["HF_HUB_DISABLE_SYMLINKS_WARNING"] = "1"
@@ -49,8 +55,14 @@ def windows_workaround_for_pyannote():
     except Exception as e:
         logging.warning(f"Windows workaround failed: {e}")
 
-def load_diarization_pipeline(pipeline_name: str, auth_token: Optional[str] = None) -> Optional[Pipeline]:
-    """ Loads the pyannote.audio diarization pipeline. """
+def load_diarization_pipeline(pipeline_name: str, auth_token: Optional[str] = None,
+                              device: Optional[str] = None) -> Optional[Pipeline]:
+    """
+    Loads the pyannote.audio diarization pipeline.
+
+    `device` (e.g. "cuda:1") is where the pipeline's weights go, so callers can match the
+    device they upload waveforms to; by default the current CUDA device is used when available.
+    """
     logging.info(f"Loading speaker diarization pipeline: {pipeline_name}...")
     
     # Apply Windows workaround
@@ -61,8 +73,10 @@ def load_diarization_pipeline(pipeline_name: str, auth_token: Optional[str] = No
             pipeline_name,
             use_auth_token=auth_token
         )
-        if torch.cuda.is_available():
-             pipeline.to(torch.device("cuda"))
+        if device is None and torch.cuda.is_available():
+            device = "cuda"
+        if device is not None and device != "cpu":
+            pipeline.to(torch.device(device))
         logging.info("Diarization pipeline loaded successfully.")
         return pipeline
     except Exception as e:
@@ -70,32 +84,81 @@ def load_diarization_pipeline(pipeline_name: str, auth_token: Optional[str] = No
         logging.error("Ensure model name is correct, you've accepted HF terms, and logged in via `huggingface-cli login` or provided a token.")
         return None
 
-def run_diarization(pipeline: Optional[Pipeline], audio_path: str) -> Any:
-    """ Runs diarization on the audio file using the loaded pipeline. """
+def run_diarization(pipeline: Optional[Pipeline], audio: Union[str, np.ndarray, torch.Tensor]) -> Any:
+    """
+    Runs diarization using the loaded pipeline.
+
+    `audio` may be a file path, or 16 kHz mono float32 samples as a NumPy array or a
+    (1, num_samples) tensor already uploaded to the pipeline's device.
+    """
     if pipeline is None:
         logging.error("Error: Diarization pipeline not loaded.")
         return None
 
-    logging.info(f"Running speaker diarization on {os.path.basename(audio_path)}...")
+    logging.info(f"Running speaker diarization on {audio_utils.describe_audio(audio)}...")
     start_diarization = time.time()
     try:
-        diarization_result = pipeline(audio_path)
+        # Hand decoded samples straight to pyannote instead of re-reading a file
+        if isinstance(audio, np.ndarray):
+            audio = torch.from_numpy(audio)
+        if isinstance(audio, torch.Tensor):
+            waveform = audio if audio.dim() == 2 else audio.unsqueeze(0)
+            audio = {"waveform": waveform, "sample_rate": audio_utils.SAMPLE_RATE}
+        diarization_result = pipeline(audio)
         logging.info(f"Diarization complete in {time.time() - start_diarization:.2f} seconds.")
         return diarization_result
     except Exception as e:
         logging.error(f"Error during diarization: {e}")
         return None
 
-def extract_speaker_turns(diarization_result: Any) -> List[Dict[str, Any]]:
-    """ Extracts speaker turns from the diarization result and sorts them. """
+def extract_speaker_turn_arrays(diarization_result: Any, merge_gap: Optional[float] = None) -> SpeakerTurns:
+    """
+    Extracts speaker turns from the diarization result as sorted parallel arrays,
+    merging turns of the same speaker that overlap or are separated by less than `merge_gap` seconds.
+    """
     if diarization_result is None:
-        return []
-    speaker_turns = []
+        return SpeakerTurns.empty()
+    if merge_gap is None:
+        merge_gap = config.DIARIZATION_MERGE_GAP_SECONDS
     try:
+        starts, ends, speakers = [], [], []
         for turn, _, speaker_label in diarization_result.itertracks(yield_label=True):
-            speaker_turns.append({"start": turn.start, "end": turn.end, "speaker": speaker_label})
-        speaker_turns.sort(key=lambda x: x['start'])
-        return speaker_turns
+            starts.append(turn.start)
+            ends.append(turn.end)
+            speakers.append(speaker_label)
+        if not starts:
+            return SpeakerTurns.empty()
+
+        order = np.argsort(starts, kind="stable")
+        starts_arr = np.asarray(starts, dtype=np.float64)[order]
+        ends_arr = np.asarray(ends, dtype=np.float64)[order]
+        speakers_arr = np.array(speakers, dtype=object)[order]
+
+        group_positions, group_ends = [], []
+        for speaker in np.unique(speakers_arr):
+            positions = np.flatnonzero(speakers_arr == speaker)
+            speaker_starts, speaker_ends = starts_arr[positions], ends_arr[positions]
+            # Compare against the furthest end so far, so a turn nested in a long one doesn't split the group
+            reach = np.maximum.accumulate(speaker_ends)
+            group_first = np.flatnonzero(np.concatenate(([True], speaker_starts[1:] - reach[:-1] >= merge_gap)))
+            group_positions.append(positions[group_first])
+            group_ends.append(np.maximum.reduceat(speaker_ends, group_first))
+
+        positions = np.concatenate(group_positions)
+        merged_order = np.argsort(positions, kind="stable")
+        positions = positions[merged_order]
+        return SpeakerTurns(
+            starts_arr[positions],
+            np.concatenate(group_ends)[merged_order],
+            speakers_arr[positions],
+        )
     except Exception as e:
          logging.error(f"Error processing diarization result tracks: {e}. Result was: {diarization_result}")
-         return []
\ No newline at end of file
+         return SpeakerTurns.empty()
+
+def extract_speaker_turns(diarization_result: Any, merge_gap: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Extracts speaker turns from the diarization result as a list of
+    {"start", "end", "speaker"} dictionaries; see extract_speaker_turn_arrays.
+    """
+    return extract_speaker_turn_arrays(diarization_result, merge_gap).as_dicts()
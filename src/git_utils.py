@@ -2,11 +2,16 @@
 import subprocess
 import logging
 import os
+import shutil
+
+# Resolve the git executable once so each command is a single exec with no shell in between
+GIT = shutil.which("git") or "git"
 
 def run_git_command(command_list, cwd):
+    if command_list and command_list[0] == "git": command_list = [GIT] + command_list[1:]  # Use the resolved executable
     logging.info(f"Running Git command: {' '.join(command_list)} in {cwd}")
     try:
-        process = subprocess.run(command_list, cwd=cwd, check=True, capture_output=True, text=True, shell=(os.name != 'nt'))
+        process = subprocess.run(command_list, cwd=cwd, check=True, capture_output=True, text=True)
         logging.info("Git command successful."); return True
     except FileNotFoundError: logging.error(f"Error: 'git' command not found..."); return False
     except subprocess.CalledProcessError as e:
@@ -14,22 +19,33 @@ def run_git_command(command_list, cwd):
         logging.error(f"Error during Git execution: {e}\nGit stdout:\n{e.stdout}\nGit stderr:\n{e.stderr}"); return False
     except Exception as e: logging.error(f"An unexpected error occurred running Git command: {e}"); return False
 
+def has_changes(repo_path, files_to_check_relative):
+    """ Returns True if any of the files differ from HEAD, False if none do, None if git status fails. """
+    try:
+        process = subprocess.run([GIT, "status", "--porcelain", "--"] + files_to_check_relative, cwd=repo_path, check=True, capture_output=True, text=True)
+        return bool(process.stdout.strip())
+    except Exception as e: logging.warning(f"Git status failed, assuming changes: {e}"); return None
+
 def add_commit_push(repo_path, files_to_add_relative, commit_message):
     if not files_to_add_relative: logging.warning("Git: No files specified to add."); return False
     logging.info("-" * 50); logging.info("Attempting Git operations...")
     if not os.path.isdir(repo_path): logging.error(f"Error: Git repository path does not exist: {repo_path}"); return False
 
+    # One status call up front lets an unchanged transcript skip pull, add, commit and push
+    if has_changes(repo_path, files_to_add_relative) is False:
+        logging.info("Git: Nothing to commit."); logging.info("-" * 50); return True
+
     logging.info("Pulling latest changes...")
-    git_pull_command = ["git", "pull"]
+    git_pull_command = [GIT, "pull"]
     if not run_git_command(git_pull_command, cwd=repo_path):
         logging.error("Git pull failed."); return False
 
-    git_add_command = ["git", "add"] + files_to_add_relative; logging.info(f"Staging files: {', '.join(files_to_add_relative)}")
+    git_add_command = [GIT, "add"] + files_to_add_relative; logging.info(f"Staging files: {', '.join(files_to_add_relative)}")
     if not run_git_command(git_add_command, cwd=repo_path): logging.error("Git add failed."); return False
-    logging.info(f"Committing with message: {commit_message}"); git_commit_command = ["git", "commit", "-m", commit_message]
+    logging.info(f"Committing with message: {commit_message}"); git_commit_command = [GIT, "commit", "-m", commit_message]
     commit_success = run_git_command(git_commit_command, cwd=repo_path)
     if not commit_success: logging.warning("Git commit failed or nothing to commit.")
-    logging.info("Pushing changes..."); git_push_command = ["git", "push"]
+    logging.info("Pushing changes..."); git_push_command = [GIT, "push"]
     if not run_git_command(git_push_command, cwd=repo_path): logging.error("Git push failed.") # Decide if this is critical
     else: logging.info("Git operations completed successfully.")
     logging.info("-" * 50); return True # Indicate Git sequence was attempted/completed
\ No newline at end of file
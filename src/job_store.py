@@ -0,0 +1,146 @@
+"""
+Job status storage for the transcribe_meeting API.
+
+This module provides an in-memory job store for single-worker deployments and an
+optional Redis-backed store so several API worker processes can share job state.
+"""
+
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+# Conditional import for the Redis backend
+try:
+    import redis.asyncio as redis_asyncio
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+class TranscriptionJob(BaseModel):
+    """Model for transcription job information."""
+    job_id: str
+    status: str  # "queued", "processing", "completed", "failed"
+    message: Optional[str] = None
+    output_file: Optional[str] = None
+
+
+class BaseJobStore(ABC):
+    """Interface shared by the job store backends."""
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[TranscriptionJob]:
+        """
+        Get a job by its identifier.
+
+        Args:
+            job_id: The job identifier
+
+        Returns:
+            The job, or None if it does not exist
+        """
+
+    @abstractmethod
+    async def set(self, job_id: str, **fields: Any) -> TranscriptionJob:
+        """
+        Create a job or update fields of an existing one.
+
+        Args:
+            job_id: The job identifier
+            **fields: TranscriptionJob fields to set
+
+        Returns:
+            The updated job
+        """
+
+    @abstractmethod
+    async def delete(self, job_id: str) -> bool:
+        """
+        Delete a job.
+
+        Args:
+            job_id: The job identifier
+
+        Returns:
+            True if the job existed, False otherwise
+        """
+
+
+class JobStore(BaseJobStore):
+    """
+    In-memory job store for a single API worker.
+
+    Each job is kept as a pre-built TranscriptionJob so status reads do not
+    re-validate the record on every request. The methods never await, so each
+    call runs to completion on the event loop without needing a lock.
+    """
+
+    def __init__(self) -> None:
+        self._fields: Dict[str, Dict[str, Any]] = {}
+        self._jobs: Dict[str, TranscriptionJob] = {}
+
+    async def get(self, job_id: str) -> Optional[TranscriptionJob]:
+        return self._jobs.get(job_id)
+
+    async def set(self, job_id: str, **fields: Any) -> TranscriptionJob:
+        merged = {**self._fields.get(job_id, {"job_id": job_id}), **fields}
+        job = TranscriptionJob(**merged)
+        self._fields[job_id] = merged
+        self._jobs[job_id] = job
+        return job
+
+    async def delete(self, job_id: str) -> bool:
+        self._fields.pop(job_id, None)
+        return self._jobs.pop(job_id, None) is not None
+
+
+class RedisJobStore(BaseJobStore):
+    """
+    Redis-backed job store, storing each job as a hash under `job:{job_id}`.
+
+    Use this when running the API with more than one uvicorn worker.
+    """
+
+    def __init__(self, url: str) -> None:
+        if not REDIS_AVAILABLE:
+            raise ImportError("redis is not available; install it to use a Redis job store")
+        self._redis = redis_asyncio.from_url(url, decode_responses=True)
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"job:{job_id}"
+
+    @staticmethod
+    def _to_job(fields: Dict[str, str]) -> TranscriptionJob:
+        # Redis hashes cannot hold None, so empty strings mark unset optional fields
+        return TranscriptionJob(**{key: (value if value != "" else None) for key, value in fields.items()})
+
+    async def get(self, job_id: str) -> Optional[TranscriptionJob]:
+        fields = await self._redis.hgetall(self._key(job_id))
+        return self._to_job(fields) if fields else None
+
+    async def set(self, job_id: str, **fields: Any) -> TranscriptionJob:
+        mapping = {"job_id": job_id, **{key: ("" if value is None else value) for key, value in fields.items()}}
+        await self._redis.hset(self._key(job_id), mapping=mapping)
+        return self._to_job(await self._redis.hgetall(self._key(job_id)))
+
+    async def delete(self, job_id: str) -> bool:
+        return bool(await self._redis.delete(self._key(job_id)))
+
+
+def create_job_store(url: str = "") -> BaseJobStore:
+    """
+    Create the job store for the configured backend.
+
+    Args:
+        url: Redis URL; an empty string selects the in-memory store
+
+    Returns:
+        The job store instance
+    """
+    if url:
+        logging.info("Using Redis job store")
+        return RedisJobStore(url)
+    return JobStore()
@@ -0,0 +1,45 @@
+"""
+Logging setup shared by the command-line scripts.
+
+Kept free of heavy imports so scripts can configure logging before loading any models.
+"""
+
+import logging
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+def setup_logging(log_level: int = logging.INFO) -> None:
+    """
+    Configure logging with formatters and handlers for console and rotating log files.
+    
+    Args:
+        log_level: The logging level to use (default: logging.INFO)
+    """
+    log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    root_logger = logging.getLogger()
+    root_logger.setLevel(log_level)
+    
+    # Clear existing handlers if any
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+        handler.close()
+    
+    # Add console handler
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(log_formatter)
+    console_handler.setLevel(log_level)
+    root_logger.addHandler(console_handler)
+    
+    # Add rotating file handler for persistent logs
+    log_dir = Path("logs")
+    log_dir.mkdir(exist_ok=True)
+    file_handler = RotatingFileHandler(
+        log_dir / "transcribe.log", 
+        maxBytes=10485760,  # 10MB
+        backupCount=5
+    )
+    file_handler.setFormatter(log_formatter)
+    file_handler.setLevel(log_level)
+    root_logger.addHandler(file_handler)
+    
+    logging.info("Logging initialized with console and file output")
@@ -1,75 +1,135 @@
 # output_utils.py
+import functools
 import math
+import operator
+import textwrap
 import logging
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Iterable, Iterator, Tuple
+
+from .alignment import WordRec
+
+# Read several WordRec fields in one C-level call instead of separate attribute lookups
+_word_fields = operator.attrgetter("start", "end", "text", "speaker")
+_text_and_speaker = operator.attrgetter("text", "speaker")
+
+# Transcripts are written through a 512 KiB buffer instead of the 8 KiB default
+OUTPUT_BUFFER_SIZE = 1 << 19
+
+# SRT entries are accumulated and written in blocks of roughly this many characters
+SRT_FLUSH_CHARS = 1 << 16
+
+@functools.lru_cache(maxsize=4096)
+def _format_hms(whole_seconds: int) -> str:
+    """ Formats whole seconds as HH:MM:SS; cached since consecutive words share seconds. """
+    hrs, rem = divmod(whole_seconds, 3600)
+    mins, sec = divmod(rem, 60)
+    return f"{hrs:02}:{mins:02}:{sec:02}"
 
 def format_srt_time(seconds: float) -> str:
     """ Converts seconds to SRT time format HH:MM:SS,ms """
-    if seconds is None or not isinstance(seconds, (int, float)) or math.isnan(seconds) or math.isinf(seconds):
+    if seconds is None or not isinstance(seconds, (int, float)) or math.isnan(seconds) or math.isinf(seconds) or seconds < 0:
         return "00:00:00,000" # Handle invalid input
-    millisec = max(0, int((seconds - int(seconds)) * 1000))
-    sec = max(0, int(seconds) % 60)
-    mins = max(0,(int(seconds) // 60) % 60)
-    hrs = max(0, int(seconds) // 3600)
-    return f"{hrs:02}:{mins:02}:{sec:02},{millisec:03}"
+    whole_seconds = int(seconds)
+    return f"{_format_hms(whole_seconds)},{int((seconds - whole_seconds) * 1000):03}"
+
+class TranscriptWriter:
+    """
+    Writes a speaker-labelled TXT transcript incrementally through one open file.
+
+    Consecutive words of the same speaker are joined into one line; a line is written
+    as soon as the speaker changes, so only the current speaker's words are held.
+    """
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._file = None
+        self._speaker = None
+        self._words: List[str] = []
+
+    def __enter__(self) -> "TranscriptWriter":
+        self._file = open(self.filepath, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE)
+        return self
+
+    def write_words(self, aligned_words: Iterable[WordRec]) -> None:
+        """ Appends aligned words, writing out each completed speaker line. """
+        for word_info in aligned_words:
+            if word_info is None: continue
+            text, speaker = _text_and_speaker(word_info)
+            if not text: continue
+            if self._speaker != speaker:
+                self._write_line()
+                self._speaker = speaker; self._words = [text]
+            else: self._words.append(text)
+
+    def _write_line(self) -> None:
+        if self._words:
+            self._file.write(f"[{self._speaker}]: {' '.join(self._words).strip()}\n")
+            self._words = []
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        try:
+            if exc_type is None:
+                self._write_line()
+        finally:
+            self._file.close()
 
-def save_transcript_with_speakers(aligned_words: List[Dict[str, Any]], filepath: str) -> bool:
+def save_transcript_with_speakers(aligned_words: Iterable[WordRec], filepath: str) -> bool:
     """
     Save the transcript with speaker information to a text file.
     
+    Words are written as they are consumed, so `aligned_words` may be a generator
+    such as alignment.iter_aligned_words.
+    
     Args:
-        aligned_words: List of word dictionaries with speaker information
+        aligned_words: Aligned words with speaker information
         filepath: Path to save the transcript file
         
     Returns:
         True if successful, False otherwise
     """
     logging.info(f"Saving transcript with speakers to: {filepath}")
-    return save_to_txt(aligned_words, filepath)
+    try:
+        with TranscriptWriter(filepath) as writer:
+            writer.write_words(aligned_words)
+        return True
+    except Exception as e:
+        logging.exception(f"Error writing TXT file {filepath}: {e}")
+        return False
 
-def save_to_txt(aligned_words: List[Dict[str, Any]], filepath: str) -> bool:
+def save_to_txt(aligned_words: Iterable[WordRec], filepath: str) -> bool:
     """ Saves the aligned transcript to a simple TXT file. """
     logging.info(f"Saving speaker-aligned TXT transcript to: {filepath}")
     try:
-        with open(filepath, "w", encoding="utf-8") as f_txt:
-            current_speaker_txt = None
-            current_line_txt = ""
-            for word_info in aligned_words:
-                if not word_info or not word_info.get("text"): continue
-                speaker = word_info.get("speaker", "UNKNOWN")
-                text = word_info["text"]
-                if current_speaker_txt != speaker:
-                    if current_line_txt: f_txt.write(f"[{current_speaker_txt}]: {current_line_txt.strip()}\n")
-                    current_speaker_txt = speaker; current_line_txt = text
-                else: current_line_txt += " " + text
-            if current_line_txt: f_txt.write(f"[{current_speaker_txt}]: {current_line_txt.strip()}\n")
+        with TranscriptWriter(filepath) as writer:
+            writer.write_words(aligned_words)
         return True
     except Exception as e: logging.error(f"Error writing TXT file {filepath}: {e}"); return False
 
+@functools.lru_cache(maxsize=None)
+def _text_wrapper(width: int) -> textwrap.TextWrapper:
+    """ One wrapper per line width; shared read-only, so safe across job threads. """
+    return textwrap.TextWrapper(width=width, break_long_words=False, break_on_hyphens=False)
+
 def _wrap_text_to_lines(text: str, max_line_length: int) -> str:
     """Helper function to wrap text to specific line length"""
     if not max_line_length or len(text) <= max_line_length:
         return text
-        
-    wrapped_lines = []
-    current_line = ""
-    words = text.split()
-    
-    for word in words:
-        if not current_line:
-            current_line = word
-        elif len(current_line) + len(word) + 1 <= max_line_length:
-            current_line += " " + word
-        else:
-            wrapped_lines.append(current_line)
-            current_line = word
-            
-    if current_line:
-        wrapped_lines.append(current_line)
-        
-    return "\n".join(wrapped_lines)
+    return "\n".join(_text_wrapper(max_line_length).wrap(text))
+
+def _iter_valid(aligned_words: Iterable[WordRec]) -> Iterator[Tuple[float, float, str, str]]:
+    """ Yields (start, end, text, speaker) for words with usable timestamps, skipping the rest. """
+    for word_info in aligned_words:
+        if word_info is None: continue
+        fields = _word_fields(word_info)
+        start, end = fields[0], fields[1]
+        if start is None or end is None or start > end: continue
+        yield fields
+
+def _format_srt_entry(sequence: int, start_text: str, end_text: str, speaker: str, text: str, max_line_length: int) -> str:
+    """ Formats one SRT entry from its pre-formatted time range and the wrapped speaker line. """
+    line_to_write = _wrap_text_to_lines(f"[{speaker}]: {text.strip()}", max_line_length)
+    return f"{sequence}\n{start_text} --> {end_text}\n{line_to_write}\n\n"
 
-def save_to_srt(aligned_words: List[Dict[str, Any]], filepath: str, srt_options: Dict[str, Any]) -> bool:
+def save_to_srt(aligned_words: List[WordRec], filepath: str, srt_options: Dict[str, Any]) -> bool:
     """ Saves the aligned transcript to an SRT subtitle file with phrase grouping and word wrap. """
     logging.info(f"Saving speaker-aligned SRT transcript to: {filepath}")
     max_line_length = srt_options.get("max_line_length", 42)
@@ -77,71 +137,69 @@ def save_to_srt(aligned_words: List[Dict[str, Any]], filepath: str, srt_options:
     gap_threshold = srt_options.get("speaker_gap_threshold", 1.0)
 
     try:
-        with open(filepath, "w", encoding="utf-8") as f_srt:
+        with open(filepath, "w", encoding="utf-8", buffering=OUTPUT_BUFFER_SIZE) as f_srt:
+            srt_entries = []
+            pending_chars = 0  # Size of the entries not yet written
             srt_sequence = 1
+            format_time = format_srt_time  # Local alias for the per-entry calls
+            previous_end = (None, "")  # Last entry's end time and its formatted text
             phrase_start_time = None
             phrase_end_time = None
-            phrase_text = ""
+            phrase_words: List[str] = []
             current_speaker_srt = None
             words_in_phrase = 0
             last_word_end_time = 0
 
-            for i, word_info in enumerate(aligned_words):
-                if not word_info or not all(k in word_info for k in ['start', 'end', 'text', 'speaker']) \
-                   or word_info['start'] is None or word_info['end'] is None: continue
-                word_start_time = word_info['start']
-                word_end_time = word_info['end']
-                speaker = word_info['speaker']
-                text = word_info['text']
-                if word_start_time > word_end_time: continue
-
+            for word_start_time, word_end_time, text, speaker in _iter_valid(aligned_words):
                 is_new_speaker = current_speaker_srt != speaker
-                is_long_gap = (i > 0) and (word_start_time - last_word_end_time > gap_threshold)
+                # Only consulted once a phrase is open, so last_word_end_time is always set here
+                is_long_gap = word_start_time - last_word_end_time > gap_threshold
                 is_phrase_too_long = (max_words_per_entry is not None and words_in_phrase >= max_words_per_entry)
 
-                if phrase_text and (is_new_speaker or is_long_gap or is_phrase_too_long):
-                    f_srt.write(str(srt_sequence) + "\n")
-                    f_srt.write(f"{format_srt_time(phrase_start_time)} --> {format_srt_time(phrase_end_time)}\n")
-                    line_to_write = f"[{current_speaker_srt}]: {phrase_text.strip()}"
-                    
-                    # Apply word wrapping
-                    line_to_write = _wrap_text_to_lines(line_to_write, max_line_length)
-                    
-                    f_srt.write(line_to_write + "\n\n")
+                if phrase_words and (is_new_speaker or is_long_gap or is_phrase_too_long):
+                    # A phrase often starts exactly where the previous one ended; reuse that string
+                    start_text = previous_end[1] if phrase_start_time == previous_end[0] else format_time(phrase_start_time)
+                    previous_end = (phrase_end_time, format_time(phrase_end_time))
+                    srt_entries.append(_format_srt_entry(
+                        srt_sequence, start_text, previous_end[1], current_speaker_srt, " ".join(phrase_words), max_line_length
+                    ))
                     srt_sequence += 1
-                    phrase_text = ""
+                    phrase_words = []
+
+                    # Flush in large blocks so memory stays bounded on long transcripts
+                    pending_chars += len(srt_entries[-1])
+                    if pending_chars > SRT_FLUSH_CHARS:
+                        f_srt.write("".join(srt_entries))
+                        srt_entries.clear()
+                        pending_chars = 0
 
-                if not phrase_text: # Start new phrase
+                if not phrase_words: # Start new phrase
                      current_speaker_srt = speaker
                      phrase_start_time = word_start_time
-                     phrase_text = text
+                     phrase_words = [text]
                      words_in_phrase = 1
                      phrase_end_time = word_end_time
                 else: # Append to existing phrase
                      if not is_new_speaker:
-                          phrase_text += " " + text
+                          phrase_words.append(text)
                           phrase_end_time = word_end_time
                           words_in_phrase += 1
                      else: # Start new phrase immediately if speaker changed
-                          phrase_text = text
+                          phrase_words = [text]
                           words_in_phrase = 1
                           current_speaker_srt = speaker
                           phrase_start_time = word_start_time
                           phrase_end_time = word_end_time
                 last_word_end_time = word_end_time
 
-            if phrase_text: # Write last phrase
-                f_srt.write(str(srt_sequence) + "\n")
-                f_srt.write(f"{format_srt_time(phrase_start_time)} --> {format_srt_time(phrase_end_time)}\n")
-                line_to_write = f"[{current_speaker_srt}]: {phrase_text.strip()}"
-                
-                # Apply word wrapping
-                line_to_write = _wrap_text_to_lines(line_to_write, max_line_length)
-                
-                f_srt.write(line_to_write + "\n\n")
+            if phrase_words: # Write last phrase
+                start_text = previous_end[1] if phrase_start_time == previous_end[0] else format_time(phrase_start_time)
+                srt_entries.append(_format_srt_entry(
+                    srt_sequence, start_text, format_time(phrase_end_time), current_speaker_srt, " ".join(phrase_words), max_line_length
+                ))
+
+            f_srt.write("".join(srt_entries))
         return True
     except Exception as e: 
-        logging.error(f"Error writing SRT file {filepath}: {e}")
-        import traceback
-        traceback.print_exc()
+        logging.exception(f"Error writing SRT file {filepath}: {e}")
         return False
\ No newline at end of file
@@ -5,6 +5,7 @@ This module provides functions to check available GPU memory,
 manage device selection, and handle resource allocation.
 """
 
+import functools
 import logging
 import os
 from typing import Dict, Optional, Tuple, Union
@@ -16,16 +17,26 @@ try:
 except ImportError:
     TORCH_AVAILABLE = False
 
+# Optional: psutil can tell physical cores apart from hyperthreads
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
 from . import config
 
 class ResourceError(Exception):
     """Exception raised for resource-related issues."""
     pass
 
+@functools.lru_cache(maxsize=1)
 def check_gpu_availability() -> bool:
     """
     Check if a CUDA-compatible GPU is available.
     
+    The result is cached, so CUDA is probed at most once per process.
+    
     Returns:
         True if a GPU is available, False otherwise
     """
@@ -35,30 +46,61 @@ def check_gpu_availability() -> bool:
     
     return torch.cuda.is_available()
 
+@functools.lru_cache(maxsize=1)
+def check_cudnn_availability() -> bool:
+    """
+    Check if cuDNN is available to PyTorch on a CUDA-compatible GPU.
+    
+    Returns:
+        True if cuDNN is available, False otherwise
+    """
+    if not check_gpu_availability():
+        return False
+    
+    return torch.backends.cudnn.is_available()
+
+@functools.lru_cache(maxsize=1)
+def get_physical_cpu_count() -> int:
+    """
+    Get the number of physical CPU cores, capped by config.CPU_THREADS.
+    
+    Falls back to the logical core count when psutil is not installed.
+    
+    Returns:
+        Number of cores available for compute threads
+    """
+    physical = psutil.cpu_count(logical=False) if PSUTIL_AVAILABLE else None
+    cores = physical or os.cpu_count() or 1
+    return max(1, min(cores, config.CPU_THREADS))
+
+# Last get_gpu_memory() result; cleared by cleanup_gpu_memory() when allocations change
+_gpu_memory_cache: Optional[Dict[int, int]] = None
+
 def get_gpu_memory() -> Dict[int, int]:
     """
     Get available memory for each GPU device.
     
+    The per-device query is cached until cleanup_gpu_memory() is called.
+    
     Returns:
         Dictionary mapping GPU device IDs to available memory in megabytes
     """
-    if not TORCH_AVAILABLE or not torch.cuda.is_available():
+    global _gpu_memory_cache
+    if not check_gpu_availability():
         return {}
     
+    if _gpu_memory_cache is not None:
+        return dict(_gpu_memory_cache)
+    
     available_memory = {}
     for i in range(torch.cuda.device_count()):
-        free_memory = torch.cuda.get_device_properties(i).total_memory
+        # Ask the driver directly so memory held by other processes is accounted for
+        free_memory, _ = torch.cuda.mem_get_info(i)
         # Reserve some memory for the system
-        free_memory = int(free_memory * 0.9 / (1024 * 1024))  # Convert to MB
-        
-        # Get currently allocated memory
-        if hasattr(torch.cuda, 'memory_reserved'):
-            allocated = torch.cuda.memory_reserved(i) / (1024 * 1024)
-            free_memory -= int(allocated)
-        
-        available_memory[i] = free_memory
+        available_memory[i] = int(free_memory * 0.9 / (1024 * 1024))  # Convert to MB
     
-    return available_memory
+    _gpu_memory_cache = available_memory
+    return dict(available_memory)
 
 def select_device() -> str:
     """
@@ -107,6 +149,8 @@ def cleanup_gpu_memory() -> None:
     """
     Release GPU memory allocations.
     """
+    global _gpu_memory_cache
+    _gpu_memory_cache = None
     if TORCH_AVAILABLE and torch.cuda.is_available():
         try:
             torch.cuda.empty_cache()
@@ -3,80 +3,51 @@
 
 import logging
 import argparse
-import os
 import sys
 from pathlib import Path
 import time
-from logging.handlers import RotatingFileHandler
 
-from transcribe_meeting import config
-from transcribe_meeting import audio_utils
-from transcribe_meeting import transcriber
-from transcribe_meeting import file_manager
-from transcribe_meeting import output_utils
-from transcribe_meeting import resource_manager
-
-def setup_logging(log_level: int = logging.INFO) -> None:
-    """Configure logging with formatters and handlers."""
-    log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    root_logger = logging.getLogger()
-    root_logger.setLevel(log_level)
-    
-    # Clear existing handlers if any
-    for handler in root_logger.handlers[:]:
-        root_logger.removeHandler(handler)
-    
-    # Add console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(log_formatter)
-    console_handler.setLevel(log_level)
-    root_logger.addHandler(console_handler)
-    
-    # Add rotating file handler for persistent logs
-    log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
-    file_handler = RotatingFileHandler(
-        log_dir / "transcribe.log", 
-        maxBytes=10485760,  # 10MB
-        backupCount=5
-    )
-    file_handler.setFormatter(log_formatter)
-    file_handler.setLevel(log_level)
-    root_logger.addHandler(file_handler)
-    
-    logging.info("Logging initialized with console and file output")
+# Heavy modules (torch, faster-whisper) are imported after argument parsing
+from transcribe_meeting.logging_utils import setup_logging
 
 def save_simple_transcript(segments, output_path):
-    """Save the transcription without speaker diarization."""
+    """
+    Save the transcription without speaker diarization.
+
+    `segments` may be the lazy generator returned by faster-whisper; each segment is
+    written as soon as it is decoded, so the transcript is never held in memory.
+    """
+    from transcribe_meeting import output_utils
+
     try:
-        with open(output_path, "w", encoding="utf-8") as f:
+        start_write = time.time()
+        with open(output_path, "w", encoding="utf-8", buffering=output_utils.OUTPUT_BUFFER_SIZE) as f:
             for i, segment in enumerate(segments):
+                # Separate segments with a blank line
+                if i > 0:
+                    f.write("\n")
                 # Format timestamp as [MM:SS]
                 start_time = time.strftime("%M:%S", time.gmtime(segment.start))
                 f.write(f"[{start_time}] {segment.text}\n")
-                if i < len(segments) - 1:
-                    f.write("\n")
-        logging.info(f"Transcript saved to {output_path}")
+        logging.info(f"Transcript saved to {output_path} in {time.time() - start_write:.2f} seconds")
         return True
     except Exception as e:
         logging.error(f"Error saving transcript: {e}")
         return False
 
 def main():
-    # Setup logging first thing
-    setup_logging()
-    
     # Parse Arguments
     parser = argparse.ArgumentParser(description="Transcribe a video file (without speaker diarization).")
     parser.add_argument("video_file_path", help="Path to the video file to process.")
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose (debug) logging")
     args = parser.parse_args()
     
-    # Set debug level if requested
-    if args.verbose:
-        setup_logging(logging.DEBUG)
-        logging.debug("Debug logging enabled")
+    # Configure logging once, at the requested level
+    setup_logging(logging.DEBUG if args.verbose else logging.INFO)
+    logging.debug("Debug logging enabled")
     
+    from transcribe_meeting import config, audio_utils, transcriber, file_manager
+
     video_path = args.video_file_path
 
     if not Path(video_path).exists(): 
@@ -114,25 +85,24 @@ def main():
         with transcriber.ModelManager(
             config.WHISPER_MODEL_SIZE, 
             config.WHISPER_DEVICE, 
-            config.WHISPER_COMPUTE_TYPE
-        ) as whisper_model:
-            if whisper_model is None:
+            config.WHISPER_COMPUTE_TYPE,
+            quantize=config.WHISPER_QUANTIZE
+        ) as whisper_manager:
+            if whisper_manager is None:
                 raise ValueError("Failed to load Whisper model.")
             
-            # Run Transcription & Materialize Results
+            # Run Transcription
             logging.info("Running transcription...")
-            raw_segments, info = transcriber.run_transcription(whisper_model, str(paths['audio_file']))
+            audio = audio_utils.load_wav_as_float32(str(paths['audio_file']))
+            if audio is None:
+                raise ValueError("Failed to load extracted audio.")
+            raw_segments, info = transcriber.run_transcription(whisper_manager.pipeline, audio)
             if raw_segments is None: 
                 raise ValueError("Transcription failed.")
             
-            logging.info("Materializing transcript segments into list...")
-            start_materialize = time.time()
-            segments_list = list(raw_segments)
-            logging.info(f"Materialization completed in {time.time() - start_materialize:.2f} seconds")
-            
-            # Save the simple transcript
+            # Stream segments to disk as they are decoded
             logging.info(f"Saving transcript to {output_txt_file}")
-            if save_simple_transcript(segments_list, output_txt_file):
+            if save_simple_transcript(raw_segments, output_txt_file):
                 processing_successful = True
                 logging.info("Processing completed successfully!")
             else:
@@ -7,115 +7,128 @@ import os
 import sys
 from pathlib import Path
 import time
-from logging.handlers import RotatingFileHandler
-from transcribe_meeting.transcriber import ModelManager
-# Add missing import from pyannote.audio
-from pyannote.audio import Pipeline
-
-# Use absolute imports instead of relative imports
-from transcribe_meeting import config
-from transcribe_meeting import audio_utils
-from transcribe_meeting import diarizer
-from transcribe_meeting import transcriber
-from transcribe_meeting import alignment
-from transcribe_meeting import output_utils
-from transcribe_meeting import file_manager
-from transcribe_meeting import resource_manager
-from transcribe_meeting import git_utils
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+# Only light imports at module level: the model stack (torch, pyannote, faster-whisper)
+# is imported inside the functions that use it, so `--help` returns immediately
+from transcribe_meeting.logging_utils import setup_logging
 
 # Set environment variables to disable symlinks in Hugging Face Hub
 os.environ["HF_HUB_DISABLE_SYMLINKS_WARNING"] = "1"
 os.environ["HF_HUB_DISABLE_SYMLINKS"] = "1"
 
-def setup_logging(log_level: int = logging.INFO) -> None:
+# Token file written by `huggingface-cli login`
+HUGGINGFACE_TOKEN_FILE = Path("~/.cache/huggingface/token")
+
+def check_and_get_huggingface_token() -> str:
     """
-    Configure logging with formatters and handlers for console and rotating log files.
+    Get the Hugging Face token from the environment, the `huggingface-cli login` token
+    file, or, when running interactively, by prompting the user.
     
-    Args:
-        log_level: The logging level to use (default: logging.INFO)
+    Returns:
+        The Hugging Face authentication token
+        
+    Raises:
+        ValueError: If no token is available and the session is not interactive
     """
-    log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    root_logger = logging.getLogger()
-    root_logger.setLevel(log_level)
+    token = os.environ.get("HUGGINGFACE_AUTH_TOKEN")
+    if token:
+        return token
     
-    # Clear existing handlers if any
-    for handler in root_logger.handlers[:]:
-        root_logger.removeHandler(handler)
+    try:
+        token = HUGGINGFACE_TOKEN_FILE.expanduser().read_text(encoding="utf-8").strip()
+    except OSError:
+        token = ""
+    if token:
+        logging.info(f"Using Hugging Face token from {HUGGINGFACE_TOKEN_FILE}")
+        return token
     
-    # Add console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(log_formatter)
-    console_handler.setLevel(log_level)
-    root_logger.addHandler(console_handler)
+    logging.warning("HUGGINGFACE_AUTH_TOKEN environment variable is not set")
+    if not sys.stdin.isatty():
+        # Fail fast in batch/CI runs instead of blocking on input()
+        raise ValueError("No Hugging Face authentication token found. Set HUGGINGFACE_AUTH_TOKEN or run `huggingface-cli login`.")
     
-    # Add rotating file handler for persistent logs
-    log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
-    file_handler = RotatingFileHandler(
-        log_dir / "transcribe.log", 
-        maxBytes=10485760,  # 10MB
-        backupCount=5
+    sys.stderr.write(
+        "\n" + "="*80 + "\n"
+        "You need a Hugging Face authentication token to use this tool.\n"
+        "1. Sign up or log in at https://huggingface.co/\n"
+        "2. Go to https://huggingface.co/settings/tokens to create a token\n"
+        "3. Accept the terms for pyannote/speaker-diarization-3.1 and pyannote/segmentation-3.0 at:\n"
+        "   https://huggingface.co/pyannote/speaker-diarization-3.1\n"
+        "   https://huggingface.co/pyannote/segmentation-3.0\n"
+        + "="*80 + "\n\n"
     )
-    file_handler.setFormatter(log_formatter)
-    file_handler.setLevel(log_level)
-    root_logger.addHandler(file_handler)
     
-    logging.info("Logging initialized with console and file output")
+    token = input("Please enter your Hugging Face authentication token: ").strip()
+    if not token:
+        raise ValueError("No Hugging Face authentication token provided. Cannot continue.")
+    
+    # Temporarily set the environment variable for this session
+    os.environ["HUGGINGFACE_AUTH_TOKEN"] = token
+    sys.stderr.write("\nToken accepted for this session. For future use, please set the HUGGINGFACE_AUTH_TOKEN environment variable.\n")
+    return token
 
-def check_and_get_huggingface_token() -> str:
+def load_diarization_pipeline_with_retries(auth_token: str, max_retries: int = 3, retry_delay: int = 5) -> Any:
     """
-    Check for Hugging Face token in environment variables or prompt user to enter it.
+    Load the diarization pipeline, retrying on transient failures.
     
+    Args:
+        auth_token: Hugging Face authentication token
+        max_retries: Number of load attempts
+        retry_delay: Seconds to wait between attempts
+        
     Returns:
-        The Hugging Face authentication token
-    """
-    token = os.environ.get("HUGGINGFACE_AUTH_TOKEN")
-    if not token:
-        logging.warning("HUGGINGFACE_AUTH_TOKEN environment variable is not set")
-        print("\n" + "="*80)
-        print("You need a Hugging Face authentication token to use this tool.")
-        print("1. Sign up or log in at https://huggingface.co/")
-        print("2. Go to https://huggingface.co/settings/tokens to create a token")
-        print("3. Accept the terms for pyannote/speaker-diarization at:")
-        print("   https://huggingface.co/pyannote/speaker-diarization")
-        print("="*80 + "\n")
+        The loaded pyannote Pipeline
         
-        token = input("Please enter your Hugging Face authentication token: ").strip()
-        if token:
-            # Temporarily set the environment variable for this session
-            os.environ["HUGGINGFACE_AUTH_TOKEN"] = token
-            print("\nToken accepted for this session. For future use, please set the HUGGINGFACE_AUTH_TOKEN environment variable.")
-        else:
-            raise ValueError("No Hugging Face authentication token provided. Cannot continue.")
-    
-    return token
+    Raises:
+        ValueError: If the pipeline could not be loaded
+    """
+    from pyannote.audio import Pipeline
+    from transcribe_meeting import config
 
-def main():
-    # Setup logging first thing
-    setup_logging()
-    
-    # --- 1. Parse Arguments ---
-    parser = argparse.ArgumentParser(description="Transcribe and diarize a video file.")
-    parser.add_argument("video_file_path", help="Path to the video file to process.")
-    parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose (debug) logging")
-    args = parser.parse_args()
+    logging.info("Loading diarization pipeline with Hugging Face token...")
+    for attempt in range(max_retries):
+        try:
+            diarization_pipeline = Pipeline.from_pretrained(
+                config.DIARIZATION_PIPELINE_NAME, use_auth_token=auth_token
+            )
+            logging.info("Speaker diarization pipeline loaded successfully.")
+            return diarization_pipeline
+        except Exception as e:
+            logging.error(
+                "Attempt %d: Error loading diarization pipeline: %s", attempt + 1, str(e)
+            )
+            if attempt < max_retries - 1:
+                logging.info("Retrying in %d seconds...", retry_delay)
+                time.sleep(retry_delay)
+
+    raise ValueError("Failed to load diarization pipeline after multiple attempts.")
+
+def prepare_one(video_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Runs the CPU-only steps for a video: paths, directories, audio extraction and decoding.
     
-    # Set debug level if requested
-    if args.verbose:
-        setup_logging(logging.DEBUG)
-        logging.debug("Debug logging enabled")
+    Kept separate from the model steps so main() can prepare the next video on a
+    background thread while the GPU works on the current one.
     
-    video_path = args.video_file_path
+    Args:
+        video_path: Path to the video file
+        
+    Returns:
+        Dict with the calculated `paths` and the decoded `audio`, or None on failure
+    """
+    from transcribe_meeting import config, audio_utils, file_manager
 
     if not Path(video_path).exists(): 
         logging.error(f"Video file not found at '{video_path}'")
-        sys.exit(1)
+        return None
 
-    # --- 2. Calculate Paths & Create Directories ---
+    # --- 1. Calculate Paths & Create Directories ---
     paths = file_manager.calculate_paths(
         video_path, config.REPO_ROOT, config.TRANSCRIPT_BASE_DIR_NAME, config.PROCESSED_VIDEO_DIR
     )
-    logging.info(f"Processing video: {video_path}")
+    logging.info(f"Preparing video: {video_path}")
     logging.info(f"  Intermediate audio: {paths['audio_file']}")
     logging.info(f"  Output directory: {paths['transcript_subdir']}")
     if paths['processed_video_path']: 
@@ -125,97 +138,78 @@ def main():
         file_manager.create_directories(paths)
     except Exception as e:
         logging.error(f"Could not create essential directories. Error: {e}")
-        sys.exit(1)
+        return None
 
-    # --- 3. Extract Audio ---
+    # --- 2. Extract Audio ---
     if not audio_utils.extract_audio(video_path, str(paths['audio_file'])): 
-        logging.error("Exiting: audio extraction failure.")
-        sys.exit(1)
+        logging.error("Skipping video: audio extraction failure.")
+        return None
 
-    # --- Main Processing Block ---
-    processing_successful = False
-    # Keep variables in scope until main() ends
-    diarization_pipeline = None
-    aligned_words = None
-    speaker_turns = []
-    segments_list = []
+    # Decode the WAV once; both models read the same in-memory samples
+    audio = audio_utils.load_wav_as_float32(str(paths['audio_file']))
+    if audio is None:
+        logging.error("Skipping video: failed to load extracted audio.")
+        return None
+    return {"paths": paths, "audio": audio}
+
+def process_one(whisper_pipeline, diarization_pipeline, video_path: str,
+                prepared: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Transcribe and diarize a single video with already loaded models.
+    
+    Args:
+        whisper_pipeline: Batched Whisper pipeline from ModelManager
+        diarization_pipeline: Loaded pyannote pipeline
+        video_path: Path to the video file
+        prepared: Result of prepare_one for this video; prepared here when omitted
+        
+    Returns:
+        True if the transcript was written, False otherwise
+    """
+    from transcribe_meeting import diarizer, transcriber, alignment, output_utils, file_manager
+
+    if prepared is None:
+        prepared = prepare_one(video_path)
+        if prepared is None:
+            return False
+    paths = prepared["paths"]
+    audio = prepared.pop("audio")
+    logging.info(f"Processing video: {video_path}")
 
+    processing_successful = False
     try:
-        # --- 4. Load Models ---
-        # Use the ModelManager context manager for the Whisper model
-        with ModelManager(
-            config.WHISPER_MODEL_SIZE, 
-            config.WHISPER_DEVICE, 
-            config.WHISPER_COMPUTE_TYPE
-        ) as whisper_model:
-            if whisper_model is None:
-                raise ValueError("Failed to load Whisper model.")
-                
-            # Check for Hugging Face token
-            try:
-                HUGGINGFACE_AUTH_TOKEN = check_and_get_huggingface_token()
-            except ValueError as e:
-                logging.error(str(e))
-                sys.exit(1)
-
-            # Retry logic for loading the diarization pipeline
-            MAX_RETRIES = 3
-            RETRY_DELAY = 5  # seconds
-
-            logging.info("Loading diarization pipeline with Hugging Face token...")
-            diag_pipeline_loaded = False
-            for attempt in range(MAX_RETRIES):
-                try:
-                    diarization_pipeline = Pipeline.from_pretrained(
-                        "pyannote/speaker-diarization@2.1", use_auth_token=HUGGINGFACE_AUTH_TOKEN
-                    )
-                    logging.info("Speaker diarization pipeline loaded successfully.")
-                    diag_pipeline_loaded = True
-                    break
-                except Exception as e:
-                    logging.error(
-                        "Attempt %d: Error loading diarization pipeline: %s", attempt + 1, str(e)
-                    )
-                    if attempt < MAX_RETRIES - 1:
-                        logging.info("Retrying in %d seconds...", RETRY_DELAY)
-                        time.sleep(RETRY_DELAY)
-
-            if not diag_pipeline_loaded:
-                raise ValueError("Failed to load diarization pipeline after multiple attempts.")
-
-            # --- 5. Run Diarization ---
-            diarization_result = diarizer.run_diarization(diarization_pipeline, str(paths['audio_file']))
-            if diarization_result is None: 
-                raise ValueError("Diarization failed.")
-            speaker_turns = diarizer.extract_speaker_turns(diarization_result)
-
-            # --- 6. Run Transcription & Materialize Results ---
-            raw_segments, info = transcriber.run_transcription(whisper_model, str(paths['audio_file']))
-            if raw_segments is None: 
-                raise ValueError("Transcription failed.")
-            
-            logging.info("Materializing transcript segments into list (might trigger GPU access)...")
-            start_materialize = time.time()
-            segments_list = list(raw_segments)
-            logging.debug(f"Materialization completed in {time.time() - start_materialize:.2f} seconds")
-            
-            # --- 7. Align Speakers with Words ---
-            logging.info("Aligning speakers with transcribed words...")
-            aligned_words = alignment.align_words_with_speakers(segments_list, speaker_turns)
-            
-            # --- 8. Generate Output Files ---
-            logging.info(f"Saving transcript to {paths['output_txt_file']}")
-            output_utils.save_transcript_with_speakers(aligned_words, paths['output_txt_file'])
-            
-            # Mark as successful
-            processing_successful = True
-            logging.info("Processing completed successfully!")
+        # --- 3. Run Transcription & Diarization Concurrently ---
+        # Transcription decodes on a worker thread while diarization runs here
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="transcribe-whisper") as executor:
+            segments_future = executor.submit(transcriber.transcribe_segments, whisper_pipeline, audio)
+            diarization_result = diarizer.run_diarization(diarization_pipeline, audio)
+            segments_list = segments_future.result()
+        del audio
+        if diarization_result is None: 
+            raise ValueError("Diarization failed.")
+        if segments_list is None: 
+            raise ValueError("Transcription failed.")
+        speaker_turns = diarizer.extract_speaker_turn_arrays(diarization_result)
+        
+        # --- 4. Align Speakers with Words ---
+        logging.info("Aligning speakers with transcribed words...")
+        # Stream aligned words straight into the writer instead of building the full list
+        aligned_words = alignment.iter_aligned_words(segments_list, speaker_turns)
+        
+        # --- 5. Generate Output Files ---
+        logging.info(f"Saving transcript to {paths['output_txt_file']}")
+        if not output_utils.save_transcript_with_speakers(aligned_words, paths['output_txt_file']):
+            raise ValueError("Failed to save transcript.")
+        
+        # Mark as successful
+        processing_successful = True
+        logging.info(f"Processing of {video_path} completed successfully!")
 
     except Exception as e:
-        logging.exception(f"Error during processing: {e}")
+        logging.exception(f"Error during processing of {video_path}: {e}")
         
     finally:
-        # --- 9. Cleanup ---
+        # --- 6. Cleanup ---
         if processing_successful:
             # Only move the original video if processing succeeded
             if paths.get('processed_video_path'):
@@ -225,10 +219,74 @@ def main():
             file_manager.delete_temp_audio(paths['audio_file'])
         else:
             logging.warning("Processing failed, intermediate files preserved for debugging")
-            
-        logging.info("Transcription process completed.")
-        return processing_successful
+
+    return processing_successful
+
+def main():
+    # --- 1. Parse Arguments ---
+    parser = argparse.ArgumentParser(description="Transcribe and diarize one or more video files.")
+    parser.add_argument("video_file_paths", nargs="+", metavar="video_file_path",
+                        help="Path(s) to the video file(s) to process; models are loaded once for all of them.")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose (debug) logging")
+    args = parser.parse_args()
+    
+    # Configure logging once, at the requested level
+    setup_logging(logging.DEBUG if args.verbose else logging.INFO)
+    logging.debug("Debug logging enabled")
+    
+    from transcribe_meeting import config, resource_manager
+    from transcribe_meeting.transcriber import ModelManager
+
+    missing_paths = [video_path for video_path in args.video_file_paths if not Path(video_path).exists()]
+    if len(missing_paths) == len(args.video_file_paths):
+        for video_path in missing_paths:
+            logging.error(f"Video file not found at '{video_path}'")
+        sys.exit(1)
+
+    # Check for Hugging Face token
+    try:
+        huggingface_auth_token = check_and_get_huggingface_token()
+    except ValueError as e:
+        logging.error(str(e))
+        sys.exit(1)
+
+    results = []
+    try:
+        # --- 2. Load Models Once ---
+        # Use the ModelManager context manager for the Whisper model
+        with ModelManager(
+            config.WHISPER_MODEL_SIZE, 
+            config.WHISPER_DEVICE, 
+            config.WHISPER_COMPUTE_TYPE,
+            quantize=config.WHISPER_QUANTIZE
+        ) as whisper_manager:
+            if whisper_manager is None:
+                raise ValueError("Failed to load Whisper model.")
+
+            diarization_pipeline = load_diarization_pipeline_with_retries(huggingface_auth_token)
+
+            # --- 3. Process Each Video With the Loaded Models ---
+            # While the models work on one video, the next one is extracted and decoded
+            video_paths = args.video_file_paths
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="transcribe-prefetch") as prefetch:
+                next_prepared = prefetch.submit(prepare_one, video_paths[0])
+                for index, video_path in enumerate(video_paths):
+                    prepared = next_prepared.result()
+                    if index + 1 < len(video_paths):
+                        next_prepared = prefetch.submit(prepare_one, video_paths[index + 1])
+                    if prepared is None:
+                        results.append(False)
+                        continue
+                    results.append(process_one(whisper_manager.pipeline, diarization_pipeline, video_path, prepared))
+                    resource_manager.cleanup_gpu_memory()
+
+    except Exception as e:
+        logging.exception(f"Error during processing: {e}")
+        
+    processing_successful = len(results) == len(args.video_file_paths) and all(results)
+    logging.info(f"Transcription process completed: {sum(results)}/{len(args.video_file_paths)} video(s) succeeded.")
+    return processing_successful
 
 if __name__ == "__main__":
     success = main()
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    sys.exit(0 if success else 1)
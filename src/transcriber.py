@@ -1,84 +1,274 @@
 # transcriber.py
 import time
 import os
+import inspect
 from faster_whisper import WhisperModel, BatchedInferencePipeline
+# ctranslate2 ships with faster-whisper; it is only used to skip compute types the device lacks
+try:
+    import ctranslate2
+    CTRANSLATE2_AVAILABLE = True
+except ImportError:
+    CTRANSLATE2_AVAILABLE = False
 from . import config
 from . import audio_utils
+from . import resource_manager
 import logging
-from typing import Optional, Any, Tuple, Dict
+from typing import Optional, Any, Tuple, Dict, List, Union
+
+import numpy as np
+
+# CTranslate2 conversions on the Hugging Face Hub for models that older faster-whisper
+# releases don't know by name; other sizes are passed through to faster-whisper as-is
+WHISPER_MODEL_REPOS = {
+    "distil-large-v3": "Systran/faster-distil-whisper-large-v3",
+    "large-v3-turbo": "mobiuslabsgmbh/faster-whisper-large-v3-turbo",
+    "turbo": "mobiuslabsgmbh/faster-whisper-large-v3-turbo",
+}
+
+def resolve_model_path(model_size: str) -> str:
+    """ Maps a configured model size to the name or Hub repo WhisperModel should load. """
+    return WHISPER_MODEL_REPOS.get(model_size, model_size)
+
+# Unquantized compute types that are upgraded to INT8 weights when quantization is enabled
+QUANTIZABLE_COMPUTE_TYPES = ("float32", "float16", "default")
+
+def resolve_compute_type(device: str, compute_type: str, quantize: bool = True) -> str:
+    """
+    Picks the CTranslate2 compute type to load with.
+
+    With `quantize`, unquantized types map to INT8 weights: `int8` on CPU and
+    `int8_float16` (INT8 weights, FP16 activations) on CUDA. Explicit INT8 variants
+    are kept as configured. CTranslate2 converts the weights at load time.
+    """
+    if not quantize or compute_type not in QUANTIZABLE_COMPUTE_TYPES:
+        return compute_type
+    return "int8_float16" if device.startswith("cuda") else "int8"
+
+def _accepts_keyword(func: Any, name: str) -> bool:
+    """ True if `func` takes a keyword argument called `name` (older faster-whisper releases lack some). """
+    try:
+        return name in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+# Batched VAD scoring arrived in later faster-whisper releases; only pass it where supported
+VAD_BATCH_SUPPORTED = _accepts_keyword(getattr(BatchedInferencePipeline, "transcribe", None), "vad_batch_size")
+
+# CTranslate2 reads its allocator settings once, when the first CUDA model is created.
+# The caching allocator keeps freed blocks for reuse, so repeated batches don't pay
+# for cudaMalloc/cudaFree; values already set in the environment take precedence.
+CT2_CUDA_ENV_DEFAULTS = {
+    "CT2_CUDA_ALLOCATOR": "cub_caching",
+}
+
+def configure_ctranslate2_env(device: str) -> None:
+    """ Applies CT2_CUDA_ENV_DEFAULTS before a CUDA model is loaded. """
+    if device.startswith("cuda"):
+        for key, value in CT2_CUDA_ENV_DEFAULTS.items():
+            os.environ.setdefault(key, value)
+
+def resolve_thread_settings(cpu_threads: Optional[int] = None, num_workers: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Picks CTranslate2 (cpu_threads, num_workers), defaulting to the configured values.
+
+    With cpu_threads unset (0), the physical cores are split evenly across the
+    workers so hyperthreads are not oversubscribed.
+    """
+    num_workers = max(1, num_workers or config.WHISPER_NUM_WORKERS)
+    cpu_threads = cpu_threads or config.WHISPER_CPU_THREADS
+    if not cpu_threads:
+        cpu_threads = max(1, resource_manager.get_physical_cpu_count() // num_workers)
+    return cpu_threads, num_workers
+
+# Compute types to fall back to, fastest first, when the device can't run the requested one
+COMPUTE_TYPE_FALLBACKS = {
+    "cuda": ("int8_float16", "float16", "int8", "float32"),
+    "cpu": ("int8", "float32"),
+}
+
+def _split_device(device: str) -> Tuple[str, int]:
+    """ Splits "cuda:1" into ("cuda", 1); CTranslate2 takes the index separately. """
+    device_type, _, index = device.partition(":")
+    return device_type, int(index) if index else 0
+
+def compute_type_candidates(device: str, compute_type: str) -> List[str]:
+    """ The requested compute type followed by the slower fallbacks the device supports. """
+    device_type, device_index = _split_device(device)
+    fallbacks = COMPUTE_TYPE_FALLBACKS.get(device_type, ())
+    if compute_type in fallbacks:
+        fallbacks = fallbacks[fallbacks.index(compute_type) + 1:]
+    candidates = [compute_type] + [ct for ct in fallbacks if ct != compute_type]
+    if CTRANSLATE2_AVAILABLE:
+        try:
+            supported = ctranslate2.get_supported_compute_types(device_type, device_index)
+            candidates = [ct for ct in candidates if ct in supported or ct == "default"] or candidates
+        except Exception as e:
+            logging.debug("Could not query supported compute types for %s: %s", device, e)
+    return candidates
+
+# Message fragments CTranslate2 uses when a device can't run a compute type; any other
+# load error (out of memory, missing model files, cuDNN) is real and must not trigger a fallback
+_UNSUPPORTED_COMPUTE_TYPE_MARKERS = ("compute type", "not support")
+
+def _is_unsupported_compute_type(error: Exception) -> bool:
+    """ True if a model load error says the requested compute type isn't supported. """
+    message = str(error).lower()
+    return any(marker in message for marker in _UNSUPPORTED_COMPUTE_TYPE_MARKERS)
+
+def _create_whisper_model(model_size: str, device: str, compute_type: str, cpu_threads: int, num_workers: int) -> WhisperModel:
+    """
+    Creates the WhisperModel, stepping down through compute_type_candidates when
+    CTranslate2 rejects a precision for this device. Other errors propagate.
+    """
+    configure_ctranslate2_env(device)
+    device_type, device_index = _split_device(device)
+    candidates = compute_type_candidates(device, compute_type)
+    for attempt, candidate in enumerate(candidates):
+        try:
+            model = WhisperModel(resolve_model_path(model_size), device=device_type, device_index=device_index,
+                                 compute_type=candidate, cpu_threads=cpu_threads, num_workers=num_workers)
+            logging.info("Whisper model loaded with compute type %s.", candidate,
+                         extra={"compute_type": candidate, "result": "ok"})
+            return model
+        except (ValueError, RuntimeError) as e:
+            if attempt == len(candidates) - 1 or not _is_unsupported_compute_type(e):
+                raise
+            logging.warning("Compute type %s not usable on %s (%s); retrying with %s",
+                            candidate, device, e, candidates[attempt + 1],
+                            extra={"compute_type": candidate, "result": "fallback"})
 
 class ModelManager:
-    """Context manager for handling Whisper model resources"""
-    def __init__(self, model_size: str, device: str, compute_type: str):
+    """Context manager for handling a Whisper model and its reusable batched pipeline"""
+    def __init__(self, model_size: str, device: str, compute_type: str, quantize: bool = True,
+                 cpu_threads: Optional[int] = None, num_workers: Optional[int] = None):
         self.model_size = model_size
         self.device = device
-        self.compute_type = compute_type
+        self.compute_type = resolve_compute_type(device, compute_type, quantize)
+        self.cpu_threads, self.num_workers = resolve_thread_settings(cpu_threads, num_workers)
         self.model = None
+        self.pipeline = None
         
-    def __enter__(self) -> Optional[WhisperModel]:
-        """Load the model when entering context"""
-        logging.info(f"Loading Whisper base model: {self.model_size} ({self.device}, {self.compute_type})...")
+    def __enter__(self) -> Optional["ModelManager"]:
+        """Load the model and build its batched pipeline when entering context"""
+        logging.info("Loading Whisper base model: %s (%s, %s)...", self.model_size, self.device, self.compute_type)
         try:
-            self.model = WhisperModel(self.model_size, device=self.device, compute_type=self.compute_type)
+            self.model = _create_whisper_model(self.model_size, self.device, self.compute_type,
+                                               self.cpu_threads, self.num_workers)
+            self.pipeline = create_batched_pipeline(self.model)
             logging.info("Whisper base model loaded successfully.")
-            return self.model
+            return self
         except Exception as e:
-            logging.error(f"Error loading Whisper base model: {e}")
+            logging.error("Error loading Whisper base model: %s", e)
             return None
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Clean up resources when exiting context"""
-        # Currently, WhisperModel doesn't have an explicit cleanup method
-        # But this context manager allows for proper cleanup in the future
+        # Drop the pipeline before the model it wraps so its workspace is released first
+        self.pipeline = None
         self.model = None
 
-def load_whisper_model(model_size: str, device: str, compute_type: str) -> Optional[WhisperModel]:
-    """ Loads the base faster-whisper model. """
-    logging.info(f"Loading Whisper base model: {model_size} ({device}, {compute_type})...")
+def create_batched_pipeline(model: WhisperModel) -> BatchedInferencePipeline:
+    """ Wraps a loaded model in a BatchedInferencePipeline that is reused for every file. """
+    logging.info("Initializing BatchedInferencePipeline...")
+    pipeline = BatchedInferencePipeline(model=model)
+    logging.info("BatchedInferencePipeline initialized.")
+    return pipeline
+
+def load_whisper_model(model_size: str, device: str, compute_type: str, quantize: bool = True,
+                       cpu_threads: Optional[int] = None, num_workers: Optional[int] = None) -> Optional[WhisperModel]:
+    """ Loads the base faster-whisper model, with INT8 weights unless `quantize` is False. """
+    compute_type = resolve_compute_type(device, compute_type, quantize)
+    cpu_threads, num_workers = resolve_thread_settings(cpu_threads, num_workers)
+    logging.info("Loading Whisper base model: %s (%s, %s)...", model_size, device, compute_type)
     try:
-        model = WhisperModel(model_size, device=device, compute_type=compute_type)
+        model = _create_whisper_model(model_size, device, compute_type, cpu_threads, num_workers)
         logging.info("Whisper base model loaded successfully.")
         return model
     except Exception as e:
-        logging.error(f"Error loading Whisper base model: {e}")
+        logging.error("Error loading Whisper base model: %s", e)
         return None
 
-def run_transcription(model: Optional[WhisperModel], audio_path: str) -> Tuple[Optional[Any], Optional[Dict]]:
-    """ Runs transcription using BatchedInferencePipeline. """
-    if model is None:
-        logging.error("Error: Whisper base model not loaded.")
+def run_transcription(pipeline: Optional[BatchedInferencePipeline], audio: Union[str, np.ndarray]) -> Tuple[Optional[Any], Optional[Dict]]:
+    """ Runs transcription on an audio file path or 16 kHz mono float32 samples using a prebuilt BatchedInferencePipeline. """
+    if pipeline is None:
+        logging.error("Error: Whisper pipeline not loaded.")
         return None, None
 
     # Get settings from config
     batch_size = config.WHISPER_BATCH_SIZE
     beam_size = config.WHISPER_BEAM_SIZE
+    vad_options = {}
+    if VAD_BATCH_SUPPORTED:
+        # Score VAD windows in batches so long, mostly silent recordings don't bottleneck on it
+        vad_options["vad_batch_size"] = config.WHISPER_VAD_BATCH_SIZE
 
-    logging.info(f"Running transcription on {os.path.basename(audio_path)} "
-          f"(batch_size={batch_size}, beam_size={beam_size}, word timestamps enabled)...")
-    start_transcription = time.time()
+    # Clips shorter than one batch window gain nothing from VAD and batching; decode them directly
+    is_short_clip = (isinstance(audio, np.ndarray)
+                     and len(audio) < config.WHISPER_BATCHED_MIN_DURATION_S * audio_utils.SAMPLE_RATE)
+
+    logging.info("Running %s transcription on %s (batch_size=%d, beam_size=%d, word timestamps enabled)...",
+                 "unbatched" if is_short_clip else "batched", audio_utils.describe_audio(audio), batch_size, beam_size)
+    start_transcription = time.perf_counter()
 
     try:
-        # Create BatchedInferencePipeline
-        logging.info("Initializing BatchedInferencePipeline...")
-        batched_model = BatchedInferencePipeline(model=model)
-        logging.info("BatchedInferencePipeline initialized.")
-
-        # Call transcribe on the batched model
-        segments, info = batched_model.transcribe(
-            audio_path,
-            batch_size=batch_size,
-            beam_size=beam_size,
-            word_timestamps=True,
-            vad_filter=True
-        )
+        if is_short_clip:
+            segments, info = pipeline.model.transcribe(
+                audio,
+                beam_size=beam_size,
+                word_timestamps=True,
+                vad_filter=False
+            )
+        else:
+            segments, info = pipeline.transcribe(
+                audio,
+                batch_size=batch_size,
+                beam_size=beam_size,
+                word_timestamps=True,
+                vad_filter=True,
+                vad_parameters={"threshold": config.WHISPER_VAD_THRESHOLD},
+                **vad_options
+            )
 
         # Note: 'segments' is a generator that will be materialized later
-        logging.info(f"Transcription call returned in {time.time() - start_transcription:.2f} seconds.")
+        logging.info("Transcription call returned in %.2f seconds.", time.perf_counter() - start_transcription)
         if info:
-             logging.info(f"Detected language: {info.language} (Prob: {info.language_probability:.2f})")
+             logging.info("Detected language: %s (Prob: %.2f)", info.language, info.language_probability)
         return segments, info
     except Exception as e:
-        logging.error(f"Error during batched transcription: {e}")
-        import traceback
-        traceback.print_exc()
-        return None, None
\ No newline at end of file
+        logging.exception("Error during batched transcription: %s", e)
+        return None, None
+
+def transcribe_segments(pipeline: Optional[BatchedInferencePipeline], audio: Union[str, np.ndarray]) -> Optional[List[Any]]:
+    """
+    Runs transcription and materializes the lazy segment generator.
+
+    Decoding happens while the generator is consumed, so callers run this on a
+    worker thread to overlap it with diarization; CTranslate2 releases the GIL.
+    """
+    segments, _ = run_transcription(pipeline, audio)
+    if segments is None:
+        return None
+    start_materialize = time.perf_counter()
+    try:
+        segments_list = list(segments)
+    except Exception as e:
+        logging.exception("Error while decoding transcript segments: %s", e)
+        return None
+    logging.debug("Materialization completed in %.2f seconds", time.perf_counter() - start_materialize)
+    return segments_list
+
+# Half a second of silence: enough to run the encoder once without producing text
+WARM_UP_AUDIO = np.zeros(audio_utils.SAMPLE_RATE // 2, dtype=np.float32)
+
+def warm_up(pipeline: BatchedInferencePipeline) -> bool:
+    """ Runs a minimal transcription on silence so an idle pipeline stays initialised. """
+    try:
+        start_warm_up = time.perf_counter()
+        segments, _ = pipeline.transcribe(WARM_UP_AUDIO, batch_size=1, beam_size=1, vad_filter=False)
+        for _ in segments:
+            pass
+        logging.debug("Whisper warm-up completed in %.2f seconds", time.perf_counter() - start_warm_up)
+        return True
+    except Exception as e:
+        logging.warning("Whisper warm-up failed: %s", e)
+        return False
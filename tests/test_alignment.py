@@ -1,5 +1,7 @@
+import numpy as np
 import pytest
-from transcribe_meeting.alignment import align_speech_and_speakers
+from transcribe_meeting import alignment, alignment_numba, config
+from transcribe_meeting.alignment import align_speech_and_speakers, iter_aligned_words, IntervalTree, SpeakerTurns
 
 # Mock data for testing
 def test_align_speech_and_speakers():
@@ -21,4 +23,122 @@ def test_align_speech_and_speakers():
     ]
 
     result = align_speech_and_speakers(segments, speaker_turns)
-    assert result == expected_output
\ No newline at end of file
+    assert [word.as_dict() for word in result] == expected_output
+
+def test_align_speech_and_speakers_uses_max_overlap():
+    segments = [
+        type("Segment", (object,), {"words": [
+            type("Word", (object,), {"start": 0.0, "end": 2.0, "word": "Hello"})
+        ]})()
+    ]
+
+    # The midpoint falls inside SPEAKER_2's short turn, but SPEAKER_1 covers most of the word
+    speaker_turns = [
+        {"start": 0.0, "end": 0.8, "speaker": "SPEAKER_1"},
+        {"start": 0.8, "end": 1.2, "speaker": "SPEAKER_2"},
+        {"start": 1.2, "end": 2.0, "speaker": "SPEAKER_1"}
+    ]
+
+    result = align_speech_and_speakers(segments, speaker_turns)
+    assert result[0].speaker == "SPEAKER_1"
+
+def test_align_speech_and_speakers_single_speaker():
+    segments = [
+        type("Segment", (object,), {"words": [
+            type("Word", (object,), {"start": 0.0, "end": 1.0, "word": "Hello"}),
+            type("Word", (object,), {"start": 5.0, "end": 6.0, "word": "again"})
+        ]})()
+    ]
+
+    speaker_turns = [
+        {"start": 0.0, "end": 1.5, "speaker": "SPEAKER_1"},
+        {"start": 2.0, "end": 3.0, "speaker": "SPEAKER_1"}
+    ]
+
+    result = align_speech_and_speakers(segments, speaker_turns)
+    assert [word.speaker for word in result] == ["SPEAKER_1", "SPEAKER_1"]
+
+def test_align_speech_and_speakers_accepts_speaker_turn_arrays():
+    segments = [
+        type("Segment", (object,), {"words": [
+            type("Word", (object,), {"start": 0.0, "end": 1.0, "word": "Hello"}),
+            type("Word", (object,), {"start": 1.1, "end": 2.0, "word": "world"})
+        ]})()
+    ]
+
+    speaker_turns = [
+        {"start": 1.5, "end": 2.5, "speaker": "SPEAKER_2"},
+        {"start": 0.0, "end": 1.5, "speaker": "SPEAKER_1"}
+    ]
+    turn_arrays = SpeakerTurns.from_dicts(speaker_turns)
+    assert turn_arrays.as_dicts() == sorted(speaker_turns, key=lambda turn: turn["start"])
+
+    result = align_speech_and_speakers(segments, turn_arrays)
+    assert [word.speaker for word in result] == ["SPEAKER_1", "SPEAKER_2"]
+
+def test_iter_aligned_words_matches_batch_alignment():
+    segments = [
+        type("Segment", (object,), {"words": [
+            type("Word", (object,), {"start": 0.0, "end": 1.0, "word": "Hello"}),
+            type("Word", (object,), {"start": 1.0, "end": 1.0, "word": " "}),
+            type("Word", (object,), {"start": 1.1, "end": 2.0, "word": "world"})
+        ]})(),
+        type("Segment", (object,), {"words": [
+            type("Word", (object,), {"start": 2.1, "end": 2.4, "word": "again"})
+        ]})()
+    ]
+
+    speaker_turns = [
+        {"start": 0.0, "end": 1.5, "speaker": "SPEAKER_1"},
+        {"start": 1.5, "end": 2.5, "speaker": "SPEAKER_2"}
+    ]
+
+    expected = [word.as_dict() for word in align_speech_and_speakers(segments, speaker_turns)]
+    result = iter_aligned_words(iter(segments), speaker_turns, batch_words=1)
+    assert [word.as_dict() for word in result] == expected
+
+def test_align_speech_and_speakers_in_threads_matches_query_many(monkeypatch):
+    rng = np.random.default_rng(0)
+    word_starts = np.sort(rng.uniform(0.0, 100.0, 200))
+    word_ends = word_starts + rng.uniform(0.0, 1.0, 200)
+    segments = [
+        type("Segment", (object,), {"words": [
+            type("Word", (object,), {"start": start, "end": end, "word": f"w{index}"})
+            for index, (start, end) in enumerate(zip(word_starts.tolist(), word_ends.tolist()))
+        ]})()
+    ]
+
+    turn_starts = np.arange(0.0, 100.0, 2.5)
+    speaker_turns = [
+        {"start": start, "end": start + 3.0, "speaker": f"SPEAKER_{index % 3}"}
+        for index, start in enumerate(turn_starts.tolist())
+    ]
+    expected = IntervalTree(speaker_turns).query_many(word_starts, word_ends).tolist()
+
+    # Force the threaded path and a small chunk cap so the words span many chunks
+    monkeypatch.setattr(alignment_numba, "NUMBA_AVAILABLE", False)
+    monkeypatch.setattr(config, "ALIGNMENT_MP_THRESHOLD", 10)
+    monkeypatch.setattr(config, "ALIGNMENT_TARGET_WORDS_PER_CHUNK", 50)
+    monkeypatch.setattr(config, "ALIGNMENT_MAX_CHUNKSIZE", 7)
+    chunk_sizes = []
+    original_query_ids = IntervalTree.query_ids
+
+    def recording_query_ids(self, starts, ends):
+        chunk_sizes.append(len(starts))
+        return original_query_ids(self, starts, ends)
+
+    monkeypatch.setattr(IntervalTree, "query_ids", recording_query_ids)
+    align_in_threads = alignment._align_in_threads
+    threaded_calls = []
+
+    def recording_align_in_threads(*args):
+        threaded_calls.append(args)
+        return align_in_threads(*args)
+
+    monkeypatch.setattr(alignment, "_align_in_threads", recording_align_in_threads)
+
+    result = align_speech_and_speakers(segments, speaker_turns)
+    assert len(threaded_calls) == 1
+    assert max(chunk_sizes) == 7
+    assert sum(chunk_sizes) == 200
+    assert [word.speaker for word in result] == expected
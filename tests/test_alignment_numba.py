@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("numba")
+
+from transcribe_meeting.alignment import IntervalTree
+from transcribe_meeting import alignment_numba
+
+def test_query_ids_matches_numpy_index():
+    speaker_turns = [
+        {"start": 0.0, "end": 2.0, "speaker": "SPEAKER_1"},
+        {"start": 1.5, "end": 4.0, "speaker": "SPEAKER_2"},
+        {"start": 4.0, "end": 6.0, "speaker": "SPEAKER_1"},
+        {"start": 8.0, "end": 9.0, "speaker": "SPEAKER_3"}
+    ]
+    turn_index = IntervalTree(speaker_turns)
+    word_starts = np.array([0.2, 1.6, 3.5, 5.0, 6.5, 7.9, 8.5, 8.5])
+    word_ends = np.array([0.8, 2.6, 4.4, 5.5, 7.0, 8.1, 8.5, 9.5])
+
+    result = alignment_numba.query_ids(turn_index, word_starts, word_ends)
+
+    np.testing.assert_array_equal(result, turn_index.query_ids(word_starts, word_ends))
@@ -4,23 +4,24 @@ This module contains tests for the FastAPI endpoints and supporting functions
 for video transcription processing.
 """
 
-import sys
+import asyncio
 import os
 from pathlib import Path
 import tempfile
 import shutil
+import time
 import uuid
 from typing import Generator, Dict, Any
+import numpy as np
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi.testclient import TestClient
 from fastapi import UploadFile, HTTPException
 
-# Add the src directory to path so we can import the package
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
-
 # Import the module under test
-from transcribe_meeting.api import app, jobs, cleanup_job_files, process_video
+from transcribe_meeting.api import app, job_store, cleanup_job_files, process_video, keepalive
+from transcribe_meeting.core import GPU_LIMITER, StageLimiter, clear_model_cache, get_diarization_pipeline, get_model_device, get_whisper_pipeline, keep_whisper_warm, transcribe_job
+from transcribe_meeting import config
 
 
 @pytest.fixture
@@ -68,16 +69,15 @@ def setup_temp_dir() -> Generator[Dict[str, Path], None, None]:
 def mock_job():
     """Create a mock job for testing."""
     job_id = str(uuid.uuid4())
-    jobs[job_id] = {
-        "job_id": job_id,
-        "status": "completed",
-        "message": "Processing completed successfully",
-        "output_file": "/path/to/output.txt"
-    }
+    asyncio.run(job_store.set(
+        job_id,
+        status="completed",
+        message="Processing completed successfully",
+        output_file="/path/to/output.txt"
+    ))
     yield job_id
     # Clean up
-    if job_id in jobs:
-        del jobs[job_id]
+    asyncio.run(job_store.delete(job_id))
 
 
 def test_health_check(test_client):
@@ -88,6 +88,7 @@ def test_health_check(test_client):
         data = response.json()
         assert data["status"] == "healthy"
         assert data["cuda_available"] == "true"
+        assert data["stages"]["gpu"] == {"in_use": 0, "limit": config.GPU_CONCURRENCY}
 
 
 @patch("transcribe_meeting.api.process_video")
@@ -116,7 +117,7 @@ def test_transcribe_video_endpoint(mock_process, test_client, setup_temp_dir):
     # (Cannot test directly since BackgroundTasks processing happens after the response)
     # but we can verify the job was created
     job_id = data["job_id"]
-    assert job_id in jobs
+    assert asyncio.run(job_store.get(job_id)) is not None
 
 
 def test_get_job_status_found(test_client, mock_job):
@@ -138,7 +139,7 @@ def test_get_job_status_not_found(test_client):
 def test_download_transcript_success(mock_path, test_client, mock_job, setup_temp_dir):
     """Test downloading a transcript successfully."""
     # Update the job to point to the mock transcript
-    jobs[mock_job]["output_file"] = str(setup_temp_dir["transcript_path"])
+    asyncio.run(job_store.set(mock_job, output_file=str(setup_temp_dir["transcript_path"])))
     
     # Mock Path.exists to return True
     mock_path_instance = MagicMock()
@@ -163,7 +164,7 @@ def test_download_transcript_job_not_found(test_client):
 def test_download_transcript_not_completed(test_client, mock_job):
     """Test downloading a transcript when the job is not completed."""
     # Update job status to "processing"
-    jobs[mock_job]["status"] = "processing"
+    asyncio.run(job_store.set(mock_job, status="processing"))
     
     response = test_client.get(f"/jobs/{mock_job}/download")
     assert response.status_code == 400
@@ -178,7 +179,7 @@ def test_delete_job(mock_cleanup, test_client, mock_job):
     assert "message" in data
     
     # Check that the job was deleted
-    assert mock_job not in jobs
+    assert asyncio.run(job_store.get(mock_job)) is None
     
     # Check that cleanup was called
     mock_cleanup.assert_called_once_with(mock_job)
@@ -190,37 +191,37 @@ def test_delete_job_not_found(test_client):
     assert response.status_code == 404
 
 
-@patch("transcribe_meeting.api.shutil.rmtree")
-@patch("transcribe_meeting.api.Path")
-def test_cleanup_job_files(mock_path, mock_rmtree):
+@patch("transcribe_meeting.core.shutil.rmtree")
+@patch("transcribe_meeting.core.TEMP_DIR")
+def test_cleanup_job_files(mock_temp_dir, mock_rmtree):
     """Test cleaning up job files."""
     # Setup
     job_id = "test-job"
     mock_path_instance = MagicMock()
     mock_path_instance.exists.return_value = True
-    mock_path.return_value = mock_path_instance
+    mock_temp_dir.__truediv__.return_value = mock_path_instance
     
     # Call the function
     cleanup_job_files(job_id)
     
     # Check that rmtree was called
-    mock_rmtree.assert_called_once()
-
-
-@patch("transcribe_meeting.api.output_utils.save_transcript_with_speakers")
-@patch("transcribe_meeting.api.alignment.align_words_with_speakers")
-@patch("transcribe_meeting.api.transcriber.run_transcription")
-@patch("transcribe_meeting.api.diarizer.extract_speaker_turns")
-@patch("transcribe_meeting.api.diarizer.run_diarization")
-@patch("transcribe_meeting.api.diarizer.load_diarization_pipeline")
-@patch("transcribe_meeting.api.transcriber.ModelManager")
-@patch("transcribe_meeting.api.resource_manager.select_device")
-@patch("transcribe_meeting.api.audio_utils.extract_audio")
+    mock_rmtree.assert_called_once_with(mock_path_instance)
+
+
+@patch("transcribe_meeting.core.output_utils.save_transcript_with_speakers")
+@patch("transcribe_meeting.core.alignment.iter_aligned_words")
+@patch("transcribe_meeting.core.transcriber.run_transcription")
+@patch("transcribe_meeting.core.diarizer.extract_speaker_turn_arrays")
+@patch("transcribe_meeting.core.diarizer.run_diarization")
+@patch("transcribe_meeting.core.diarizer.load_diarization_pipeline")
+@patch("transcribe_meeting.core.transcriber.load_whisper_model")
+@patch("transcribe_meeting.core.resource_manager.select_device")
+@patch("transcribe_meeting.core.audio_utils.extract_audio_to_array")
 @pytest.mark.asyncio
 async def test_process_video_success(
     mock_extract_audio: MagicMock,
     mock_select_device: MagicMock,
-    mock_model_manager: MagicMock,
+    mock_load_whisper: MagicMock,
     mock_load_diarization: MagicMock,
     mock_run_diarization: MagicMock,
     mock_extract_speaker_turns: MagicMock,
@@ -240,12 +241,13 @@ async def test_process_video_success(
     # Setup
     job_id = "test-job"
     video_path = Path("/path/to/video.mp4")
-    jobs[job_id] = {"status": "queued", "message": "Queued", "output_file": None}
+    await job_store.set(job_id, status="queued", message="Queued", output_file=None)
+    clear_model_cache()
     
     # Mock returns
-    mock_extract_audio.return_value = True
+    mock_extract_audio.return_value = np.zeros(16000, dtype=np.float32)
     mock_select_device.return_value = "cpu"
-    mock_model_manager.return_value.__enter__.return_value = "whisper_model"
+    mock_load_whisper.return_value = "whisper_model"
     mock_load_diarization.return_value = "diarization_pipeline"
     mock_run_diarization.return_value = "diarization_result"
     mock_extract_speaker_turns.return_value = ["speaker1", "speaker2"]
@@ -253,17 +255,18 @@ async def test_process_video_success(
     mock_align_words.return_value = ["aligned_word1", "aligned_word2"]
     
     # Call the function
-    await process_video(job_id, video_path)
+    await process_video(job_id, video_path, job_store)
     
     # Check that job was updated
-    assert jobs[job_id]["status"] == "completed"
-    assert "completed" in jobs[job_id]["message"]
-    assert jobs[job_id]["output_file"] is not None
+    job = await job_store.get(job_id)
+    assert job.status == "completed"
+    assert "completed" in job.message
+    assert job.output_file is not None
     
     # Check that functions were called
     mock_extract_audio.assert_called_once()
     mock_select_device.assert_called_once()
-    mock_model_manager.assert_called_once()
+    mock_load_whisper.assert_called_once()
     mock_load_diarization.assert_called_once()
     mock_run_diarization.assert_called_once()
     mock_extract_speaker_turns.assert_called_once()
@@ -272,24 +275,187 @@ async def test_process_video_success(
     mock_save_transcript.assert_called_once()
 
 
-@patch("transcribe_meeting.api.audio_utils.extract_audio")
+@patch("transcribe_meeting.core.audio_utils.extract_audio_to_array")
 @pytest.mark.asyncio
 async def test_process_video_extraction_failure(mock_extract_audio):
     """Test handling audio extraction failure during video processing."""
     # Setup
     job_id = "test-job"
     video_path = Path("/path/to/video.mp4")
-    jobs[job_id] = {"status": "queued", "message": "Queued", "output_file": None}
+    await job_store.set(job_id, status="queued", message="Queued", output_file=None)
     
-    # Mock extract_audio to return False (failure)
-    mock_extract_audio.return_value = False
+    # Mock extract_audio_to_array to return None (failure)
+    mock_extract_audio.return_value = None
     
     # Call the function
-    await process_video(job_id, video_path)
+    await process_video(job_id, video_path, job_store)
     
     # Check that job was updated with failure
-    assert jobs[job_id]["status"] == "failed"
-    assert "failed" in jobs[job_id]["message"].lower()
+    job = await job_store.get(job_id)
+    assert job.status == "failed"
+    assert "failed" in job.message.lower()
+    
+    # Only extract_audio_to_array should be called
+    mock_extract_audio.assert_called_once()
+
+@patch("transcribe_meeting.core.output_utils.save_transcript_with_speakers")
+@patch("transcribe_meeting.core.alignment.iter_aligned_words")
+@patch("transcribe_meeting.core.transcriber.run_transcription")
+@patch("transcribe_meeting.core.diarizer.extract_speaker_turn_arrays")
+@patch("transcribe_meeting.core.diarizer.run_diarization")
+@patch("transcribe_meeting.core.diarizer.load_diarization_pipeline")
+@patch("transcribe_meeting.core.transcriber.load_whisper_model")
+@patch("transcribe_meeting.core.resource_manager.select_device")
+@patch("transcribe_meeting.core.audio_utils.extract_audio_to_array")
+@pytest.mark.asyncio
+async def test_process_video_reuses_loaded_models(
+    mock_extract_audio: MagicMock,
+    mock_select_device: MagicMock,
+    mock_load_whisper: MagicMock,
+    mock_load_diarization: MagicMock,
+    mock_run_diarization: MagicMock,
+    mock_extract_speaker_turns: MagicMock,
+    mock_run_transcription: MagicMock,
+    mock_align_words: MagicMock,
+    mock_save_transcript: MagicMock
+) -> None:
+    """Test that consecutive jobs share the models loaded by the first one."""
+    clear_model_cache()
+    mock_extract_audio.return_value = np.zeros(16000, dtype=np.float32)
+    mock_select_device.return_value = "cpu"
+    mock_run_transcription.return_value = ([], {})
+    mock_align_words.return_value = []
+    
+    for job_id in ("job-1", "job-2"):
+        await job_store.set(job_id, status="queued", message="Queued", output_file=None)
+        await process_video(job_id, Path("/path/to/video.mp4"), job_store)
+        assert (await job_store.get(job_id)).status == "completed"
+        await job_store.delete(job_id)
+    
+    mock_load_whisper.assert_called_once()
+    mock_load_diarization.assert_called_once()
+    clear_model_cache()
+
+
+@patch("transcribe_meeting.core.diarizer.run_diarization", side_effect=RuntimeError("CUDA out of memory"))
+@patch("transcribe_meeting.core.diarizer.load_diarization_pipeline")
+@patch("transcribe_meeting.core.transcriber.load_whisper_model")
+@patch("transcribe_meeting.core.resource_manager.select_device", return_value="cpu")
+@patch("transcribe_meeting.core.audio_utils.extract_audio_to_array")
+def test_transcribe_job_waits_for_transcription_when_diarization_raises(
+    mock_extract_audio: MagicMock,
+    mock_select_device: MagicMock,
+    mock_load_whisper: MagicMock,
+    mock_load_diarization: MagicMock,
+    mock_run_diarization: MagicMock
+) -> None:
+    """Test that a diarization error doesn't release the GPU stage while Whisper still runs."""
+    clear_model_cache()
+    mock_extract_audio.return_value = np.zeros(16000, dtype=np.float32)
+    gpu_slots_during_transcription = []
+    
+    def slow_transcription(pipeline, audio):
+        time.sleep(0.05)
+        gpu_slots_during_transcription.append(GPU_LIMITER.stats()["in_use"])
+        return []
+    
+    with patch("transcribe_meeting.core.transcriber.transcribe_segments", side_effect=slow_transcription):
+        with pytest.raises(RuntimeError, match="CUDA out of memory"):
+            transcribe_job("test-job", Path("/path/to/video.mp4"))
     
-    # Only extract_audio should be called
-    mock_extract_audio.assert_called_once()
\ No newline at end of file
+    assert gpu_slots_during_transcription == [1]
+    assert GPU_LIMITER.stats()["in_use"] == 0
+    clear_model_cache()
+
+
+@patch("transcribe_meeting.core.diarizer.load_diarization_pipeline")
+@patch("transcribe_meeting.core.transcriber.load_whisper_model")
+@patch("transcribe_meeting.core.resource_manager.select_device")
+def test_model_device_is_selected_once(
+    mock_select_device: MagicMock,
+    mock_load_whisper: MagicMock,
+    mock_load_diarization: MagicMock
+) -> None:
+    """Test that the models stay on the first selected device when select_device changes its answer."""
+    clear_model_cache()
+    mock_select_device.side_effect = ["cuda:1", "cuda:0", "cpu"]
+    
+    for _ in range(3):
+        get_whisper_pipeline(config.WHISPER_MODEL_SIZE, config.WHISPER_COMPUTE_TYPE)
+        get_diarization_pipeline(config.DIARIZATION_PIPELINE_NAME, config.HUGGINGFACE_AUTH_TOKEN)
+        assert get_model_device() == "cuda:1"
+    
+    mock_select_device.assert_called_once()
+    mock_load_whisper.assert_called_once()
+    assert mock_load_whisper.call_args.args[1] == "cuda:1"
+    mock_load_diarization.assert_called_once()
+    assert mock_load_diarization.call_args.args[2] == "cuda:1"
+    clear_model_cache()
+
+
+@patch("transcribe_meeting.core.diarizer.load_diarization_pipeline")
+@patch("transcribe_meeting.core.transcriber.load_whisper_model")
+@patch("transcribe_meeting.core.resource_manager.select_device")
+def test_startup_preloads_models(
+    mock_select_device: MagicMock,
+    mock_load_whisper: MagicMock,
+    mock_load_diarization: MagicMock
+) -> None:
+    """Test that the models are loaded once when the app starts."""
+    clear_model_cache()
+    mock_select_device.return_value = "cpu"
+    
+    with patch("transcribe_meeting.api.config.PRELOAD_MODELS", True):
+        with TestClient(app):
+            pass
+    
+    mock_load_whisper.assert_called_once()
+    mock_load_diarization.assert_called_once()
+    clear_model_cache()
+
+
+def test_stage_limiter_tracks_occupancy() -> None:
+    """Test that a stage limiter counts the jobs inside it and frees slots on error."""
+    limiter = StageLimiter(2)
+    with limiter:
+        with limiter:
+            assert limiter.stats() == {"in_use": 2, "limit": 2}
+    with pytest.raises(RuntimeError):
+        with limiter:
+            raise RuntimeError("stage failed")
+    assert limiter.stats() == {"in_use": 0, "limit": 2}
+
+
+@patch("transcribe_meeting.core.transcriber.warm_up", return_value=True)
+@patch("transcribe_meeting.core.transcriber.load_whisper_model")
+@patch("transcribe_meeting.core.resource_manager.select_device", return_value="cpu")
+def test_keep_whisper_warm_skips_unloaded_or_busy(
+    mock_select_device: MagicMock,
+    mock_load_whisper: MagicMock,
+    mock_warm_up: MagicMock
+) -> None:
+    """Test that warm-up never loads the model and never waits on a running job."""
+    clear_model_cache()
+    assert keep_whisper_warm() is False
+    mock_load_whisper.assert_not_called()
+    
+    get_whisper_pipeline(config.WHISPER_MODEL_SIZE, config.WHISPER_COMPUTE_TYPE)
+    with GPU_LIMITER:
+        assert keep_whisper_warm() is False
+    mock_warm_up.assert_not_called()
+    
+    assert keep_whisper_warm() is True
+    mock_warm_up.assert_called_once()
+    clear_model_cache()
+
+
+@patch("transcribe_meeting.api.keep_whisper_warm")
+@pytest.mark.asyncio
+async def test_keepalive_runs_until_stopped(mock_keep_warm: MagicMock) -> None:
+    """Test that the keepalive loop warms periodically and exits when stopped."""
+    stop = asyncio.Event()
+    task = asyncio.create_task(keepalive(stop, 0.01))
+    await asyncio.sleep(0.05)
+    stop.set()
+    await asyncio.wait_for(task, timeout=1)
+    assert mock_keep_warm.call_count >= 1
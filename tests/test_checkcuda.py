@@ -1,8 +1,23 @@
 import pytest
 from unittest.mock import patch
 import transcribe_meeting.checkcuda as checkcuda
+from transcribe_meeting import resource_manager
 import torch
 
+@pytest.fixture(autouse=True)
+def clear_capability_cache():
+    resource_manager.check_gpu_availability.cache_clear()
+    resource_manager.check_cudnn_availability.cache_clear()
+    yield
+    resource_manager.check_gpu_availability.cache_clear()
+    resource_manager.check_cudnn_availability.cache_clear()
+
+def test_import_has_no_output():
+    with patch("builtins.print") as mock_print:
+        import importlib
+        importlib.reload(checkcuda)
+        mock_print.assert_not_called()
+
 @patch("torch.cuda.is_available", return_value=True)
 @patch("torch.cuda.device_count", return_value=1)
 @patch("torch.cuda.get_device_name", return_value="NVIDIA Test GPU")
@@ -10,10 +25,10 @@ import torch
 @patch("torch.backends.cudnn.version", return_value=8000)
 def test_check_cuda(mock_is_available, mock_device_count, mock_get_device_name, mock_cudnn_available, mock_cudnn_version):
     with patch("builtins.print") as mock_print:
-        import transcribe_meeting.checkcuda as checkcuda
-        mock_print.assert_any_call("PyTorch version: 2.5.1+cu121")
+        checkcuda.main()
+        mock_print.assert_any_call(f"PyTorch version: {torch.__version__}")
         mock_print.assert_any_call("Is CUDA available? True")
         mock_print.assert_any_call("Number of GPUs available: 1")
         mock_print.assert_any_call("Current GPU name: NVIDIA Test GPU")
         mock_print.assert_any_call("Is cuDNN available? True")
-        mock_print.assert_any_call("cuDNN version: 8000")
\ No newline at end of file
+        mock_print.assert_any_call("cuDNN version: 8000")
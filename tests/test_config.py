@@ -1,13 +1,9 @@
 """Tests for the config module."""
 
 import os
-import sys
 from pathlib import Path
 import pytest
 
-# Add the src directory to path so we can import the package
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
-
 # Import the module under test
 from transcribe_meeting import config
 
@@ -40,7 +36,7 @@ def test_default_config_values(reset_config):
     cfg = config.load_config()
     
     # Check that default values are set
-    assert cfg["WHISPER_MODEL_SIZE"] == "medium"
+    assert cfg["WHISPER_MODEL_SIZE"] == "large-v3-turbo"
     assert cfg["TRANSCRIPT_BASE_DIR_NAME"] == "transcripts"
     assert isinstance(cfg["REPO_ROOT"], Path)
     assert cfg["CPU_THREADS"] > 0
@@ -55,6 +51,7 @@ def test_env_var_overrides(reset_config):
     os.environ["TRANSCRIBE_WHISPER_MODEL_SIZE"] = "small"
     os.environ["TRANSCRIBE_TRANSCRIPT_BASE_DIR_NAME"] = "custom_transcripts"
     os.environ["TRANSCRIBE_GPU_MEMORY_THRESHOLD_MB"] = "3000"
+    os.environ["TRANSCRIBE_WHISPER_CPU_THREADS"] = "6"
     
     # Load the configuration
     cfg = config.load_config()
@@ -63,6 +60,7 @@ def test_env_var_overrides(reset_config):
     assert cfg["WHISPER_MODEL_SIZE"] == "small"
     assert cfg["TRANSCRIPT_BASE_DIR_NAME"] == "custom_transcripts"
     assert cfg["GPU_MEMORY_THRESHOLD_MB"] == 3000
+    assert cfg["WHISPER_CPU_THREADS"] == 6
 
 
 def test_config_validation_valid_values(reset_config):
@@ -72,6 +70,8 @@ def test_config_validation_valid_values(reset_config):
         {"WHISPER_MODEL_SIZE": "tiny", "WHISPER_DEVICE": "cpu", "WHISPER_COMPUTE_TYPE": "float32"},
         {"WHISPER_MODEL_SIZE": "base", "WHISPER_DEVICE": "cuda", "WHISPER_COMPUTE_TYPE": "float16"},
         {"WHISPER_MODEL_SIZE": "small", "WHISPER_DEVICE": "cpu", "WHISPER_COMPUTE_TYPE": "int8"},
+        {"WHISPER_MODEL_SIZE": "large", "WHISPER_DEVICE": "cuda", "WHISPER_COMPUTE_TYPE": "int8_float16"},
+        {"WHISPER_MODEL_SIZE": "distil-large-v3", "WHISPER_DEVICE": "cpu", "WHISPER_COMPUTE_TYPE": "int8"},
     ]
     
     for valid_config in valid_configs:
@@ -1,7 +1,7 @@
 import pytest
 from unittest.mock import patch, MagicMock
 import torch
-from transcribe_meeting.diarizer import load_diarization_pipeline, run_diarization, extract_speaker_turns
+from transcribe_meeting.diarizer import load_diarization_pipeline, run_diarization, extract_speaker_turns, extract_speaker_turn_arrays
 
 @patch("transcribe_meeting.diarizer.Pipeline.from_pretrained")
 def test_load_diarization_pipeline_success(mock_from_pretrained):
@@ -66,6 +66,19 @@ def test_load_diarization_pipeline_without_gpu(mock_from_pretrained, mock_cuda_a
     assert result == mock_pipeline
     mock_pipeline.to.assert_not_called()
 
+@patch('torch.cuda.is_available', return_value=True)
+@patch("transcribe_meeting.diarizer.Pipeline.from_pretrained")
+def test_load_diarization_pipeline_on_requested_device(mock_from_pretrained, mock_cuda_available):
+    mock_pipeline = MagicMock()
+    mock_from_pretrained.return_value = mock_pipeline
+    
+    assert load_diarization_pipeline("test-pipeline", "test-token", "cuda:1") == mock_pipeline
+    mock_pipeline.to.assert_called_once_with(torch.device("cuda:1"))
+    
+    mock_pipeline.to.reset_mock()
+    load_diarization_pipeline("test-pipeline", "test-token", "cpu")
+    mock_pipeline.to.assert_not_called()
+
 def test_run_diarization_with_none_pipeline():
     result = run_diarization(None, "test-audio.wav")
     assert result is None
@@ -93,4 +106,48 @@ def test_extract_speaker_turns_with_unsorted_speakers():
         {"start": 1.0, "end": 2.0, "speaker": "SPEAKER_2"},
         {"start": 2.0, "end": 3.0, "speaker": "SPEAKER_1"}
     ]
-    assert result == expected
\ No newline at end of file
+    assert result == expected
+
+def test_extract_speaker_turns_merges_adjacent_same_speaker():
+    diarization_result = MagicMock()
+    diarization_result.itertracks.return_value = [
+        (MagicMock(start=0.0, end=1.0), None, "SPEAKER_1"),
+        (MagicMock(start=1.05, end=2.0), None, "SPEAKER_1"),
+        (MagicMock(start=2.0, end=3.0), None, "SPEAKER_2"),
+        (MagicMock(start=4.0, end=5.0), None, "SPEAKER_2")
+    ]
+    result = extract_speaker_turns(diarization_result, merge_gap=0.1)
+    expected = [
+        {"start": 0.0, "end": 2.0, "speaker": "SPEAKER_1"},
+        {"start": 2.0, "end": 3.0, "speaker": "SPEAKER_2"},
+        {"start": 4.0, "end": 5.0, "speaker": "SPEAKER_2"}
+    ]
+    assert result == expected
+
+def test_extract_speaker_turns_merges_turns_nested_in_a_long_turn():
+    diarization_result = MagicMock()
+    diarization_result.itertracks.return_value = [
+        (MagicMock(start=0.0, end=10.0), None, "SPEAKER_1"),
+        (MagicMock(start=2.0, end=3.0), None, "SPEAKER_1"),
+        (MagicMock(start=4.0, end=4.5), None, "SPEAKER_2"),
+        (MagicMock(start=5.0, end=6.0), None, "SPEAKER_1"),
+        (MagicMock(start=10.05, end=12.0), None, "SPEAKER_1")
+    ]
+    result = extract_speaker_turns(diarization_result, merge_gap=0.1)
+    expected = [
+        {"start": 0.0, "end": 12.0, "speaker": "SPEAKER_1"},
+        {"start": 4.0, "end": 4.5, "speaker": "SPEAKER_2"}
+    ]
+    assert result == expected
+
+def test_extract_speaker_turn_arrays():
+    diarization_result = MagicMock()
+    diarization_result.itertracks.return_value = [
+        (MagicMock(start=1.0, end=2.0), None, "SPEAKER_2"),
+        (MagicMock(start=0.0, end=1.0), None, "SPEAKER_1")
+    ]
+    turns = extract_speaker_turn_arrays(diarization_result)
+    assert turns.starts.tolist() == [0.0, 1.0]
+    assert turns.ends.tolist() == [1.0, 2.0]
+    assert turns.speakers.tolist() == ["SPEAKER_1", "SPEAKER_2"]
+    assert len(extract_speaker_turn_arrays(None)) == 0
@@ -1,15 +1,8 @@
 """Tests for the file_manager module."""
 
-import os
-import shutil
-import tempfile
-from pathlib import Path
 import pytest
-import sys
-import datetime
-
-# Add the src directory to path so we can import the package
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from pathlib import Path
+from freezegun import freeze_time
 
 from transcribe_meeting.file_manager import (
     calculate_paths,
@@ -18,31 +11,17 @@ from transcribe_meeting.file_manager import (
     move_video,
 )
 
-@pytest.fixture
-def temp_dir():
-    """Create a temporary directory for testing."""
-    tmp_dir = tempfile.mkdtemp()
-    yield Path(tmp_dir)
-    # Clean up after the test
-    if os.path.exists(tmp_dir):
-        shutil.rmtree(tmp_dir)
+pytestmark = pytest.mark.io
 
-def test_calculate_paths(temp_dir, monkeypatch):
+@freeze_time("2023-05-15")
+def test_calculate_paths():
     """Test that calculate_paths returns the expected file paths."""
-    # Setup
-    video_path = temp_dir / "test_video.mp4"
-    repo_root = temp_dir / "repo_root"
+    # Setup: path arithmetic only, so the video doesn't need to exist
+    base_dir = Path("/videos")
+    video_path = base_dir / "test_video.mp4"
+    repo_root = base_dir / "repo_root"
     transcript_base_dir_name = "transcripts"
-    processed_video_dir = temp_dir / "processed"
-    
-    # Create the test file
-    video_path.touch()
-    
-    # Mock datetime.datetime.now to return a fixed date
-    fixed_date = datetime.datetime(2023, 5, 15)
-    monkeypatch.setattr(datetime, "datetime", type('datetime', (), {
-        'now': lambda: fixed_date
-    }))
+    processed_video_dir = base_dir / "processed"
     
     # Execute
     paths = calculate_paths(
@@ -55,30 +34,30 @@ def test_calculate_paths(temp_dir, monkeypatch):
     # Assert
     assert paths["video_path"] == video_path
     assert paths["base_name"] == "test_video"
-    assert paths["video_dir"] == temp_dir
-    assert paths["audio_file"] == temp_dir / "test_video_audio.wav"
+    assert paths["video_dir"] == base_dir
+    assert paths["audio_file"] == base_dir / "test_video_audio.wav"
     assert paths["transcript_subdir"] == repo_root / transcript_base_dir_name / "2023" / "05"
     assert paths["output_txt_file"] == paths["transcript_subdir"] / "test_video_transcript_speakers.txt"
     assert paths["processed_video_path"] == processed_video_dir / "test_video.mp4"
 
-def test_create_directories(temp_dir):
+def test_create_directories(fs):
     """Test directory creation functionality."""
     # Setup
     paths = {
-        "transcript_subdir": temp_dir / "transcripts" / "2023" / "01"
+        "transcript_subdir": Path("/repo/transcripts/2023/01")
     }
     
     # Execute
     create_directories(paths)
     
     # Assert
-    assert (temp_dir / "transcripts" / "2023" / "01").exists()
+    assert Path("/repo/transcripts/2023/01").is_dir()
 
-def test_delete_temp_audio(temp_dir):
+def test_delete_temp_audio(fs):
     """Test temporary audio file deletion."""
     # Setup
-    audio_path = temp_dir / "temp_audio.wav"
-    audio_path.touch()
+    audio_path = Path("/videos/temp_audio.wav")
+    fs.create_file(audio_path)
     
     # Verify the file exists
     assert audio_path.exists()
@@ -89,18 +68,19 @@ def test_delete_temp_audio(temp_dir):
     # Assert the file was deleted
     assert not audio_path.exists()
 
-def test_move_video(temp_dir):
+def test_move_video(fs):
     """Test video file moving functionality."""
     # Setup
-    source_path = temp_dir / "source_dir"
-    source_path.mkdir()
-    video_file = source_path / "test_video.mp4"
-    video_file.touch()
+    video_file = Path("/source_dir/test_video.mp4")
+    fs.create_file(video_file)
     
-    dest_dir = temp_dir / "dest_dir"
-    dest_dir.mkdir(parents=True)
+    dest_dir = Path("/dest_dir")
+    fs.create_dir(dest_dir)
     dest_path = dest_dir / "moved_video.mp4"
     
+    # Same device, so shutil.move takes its rename fast path rather than copy + unlink
+    assert video_file.parent.stat().st_dev == dest_dir.stat().st_dev
+    
     # Execute
     result = move_video(video_file, dest_path)
     
@@ -1,6 +1,10 @@
+import subprocess
 import pytest
 from unittest.mock import patch, MagicMock
-from transcribe_meeting.git_utils import run_git_command, add_commit_push
+from transcribe_meeting.git_utils import run_git_command, add_commit_push, has_changes, GIT
+
+# Failure raised by subprocess.run(check=True); output is captured as text, so stdout/stderr are strings
+GIT_STATUS_ERROR = subprocess.CalledProcessError(128, ["git", "status"], output="", stderr="fatal: not a git repository")
 
 @patch("subprocess.run")
 def test_run_git_command_success(mock_run):
@@ -10,20 +14,49 @@ def test_run_git_command_success(mock_run):
 
 @patch("subprocess.run")
 def test_run_git_command_failure(mock_run):
-    mock_run.side_effect = Exception("Git command failed")
+    mock_run.side_effect = GIT_STATUS_ERROR
     result = run_git_command(["git", "status"], "test_repo")
     assert result is False
 
-@patch("os.path.isdir", return_value=True)
+@patch("transcribe_meeting.git_utils.has_changes", return_value=True)
 @patch("transcribe_meeting.git_utils.run_git_command")
-def test_add_commit_push_success(mock_run_git_command, mock_isdir):
+def test_add_commit_push_success(mock_run_git_command, mock_has_changes, monkeypatch):
+    monkeypatch.setattr("os.path.isdir", lambda path: True)
     mock_run_git_command.return_value = True
     result = add_commit_push("test_repo", ["file1.txt", "file2.txt"], "Test commit")
     assert result is True
 
-@patch("os.path.isdir", return_value=True)
+@patch("transcribe_meeting.git_utils.has_changes", return_value=True)
 @patch("transcribe_meeting.git_utils.run_git_command")
-def test_add_commit_push_failure(mock_run_git_command, mock_isdir):
+def test_add_commit_push_failure(mock_run_git_command, mock_has_changes, monkeypatch):
+    monkeypatch.setattr("os.path.isdir", lambda path: True)
     mock_run_git_command.return_value = False
     result = add_commit_push("test_repo", ["file1.txt", "file2.txt"], "Test commit")
-    assert result is False
\ No newline at end of file
+    assert result is False
+
+@patch("subprocess.run")
+def test_run_git_command_runs_without_shell(mock_run):
+    run_git_command(["git", "commit", "-m", "Test commit"], "test_repo")
+    args, kwargs = mock_run.call_args
+    assert args[0] == [GIT, "commit", "-m", "Test commit"]
+    assert kwargs.get("shell", False) is False
+
+@patch("transcribe_meeting.git_utils.has_changes", return_value=False)
+@patch("transcribe_meeting.git_utils.run_git_command")
+def test_add_commit_push_skips_unchanged_files(mock_run_git_command, mock_has_changes, monkeypatch):
+    monkeypatch.setattr("os.path.isdir", lambda path: True)
+    result = add_commit_push("test_repo", ["file1.txt"], "Test commit")
+    assert result is True
+    mock_run_git_command.assert_not_called()
+
+@patch("subprocess.run")
+def test_has_changes(mock_run):
+    mock_run.return_value.stdout = ""
+    assert has_changes("test_repo", ["file1.txt"]) is False
+    assert mock_run.call_args.args[0] == [GIT, "status", "--porcelain", "--", "file1.txt"]
+
+    mock_run.return_value.stdout = " M file1.txt\n"
+    assert has_changes("test_repo", ["file1.txt"]) is True
+
+    mock_run.side_effect = subprocess.CalledProcessError(128, ["git", "status"], output="", stderr="fatal")
+    assert has_changes("test_repo", ["file1.txt"]) is None
@@ -0,0 +1,52 @@
+"""Tests for the job_store module."""
+
+import pytest
+
+from transcribe_meeting.job_store import BaseJobStore, JobStore, RedisJobStore, TranscriptionJob, create_job_store
+
+
+@pytest.mark.asyncio
+async def test_set_creates_and_updates_job():
+    """Test that set creates a job and merges later updates into it."""
+    store = JobStore()
+
+    job = await store.set("job-1", status="queued", message="Queued")
+    assert job == TranscriptionJob(job_id="job-1", status="queued", message="Queued")
+
+    job = await store.set("job-1", status="completed", output_file="/tmp/out.txt")
+    assert job.status == "completed"
+    assert job.message == "Queued"
+    assert job.output_file == "/tmp/out.txt"
+    assert await store.get("job-1") is job
+
+
+@pytest.mark.asyncio
+async def test_get_missing_job_returns_none():
+    """Test that unknown jobs are reported as missing."""
+    store = JobStore()
+    assert await store.get("missing") is None
+
+
+@pytest.mark.asyncio
+async def test_delete_job():
+    """Test that delete removes a job and reports whether it existed."""
+    store = JobStore()
+    await store.set("job-1", status="queued")
+
+    assert await store.delete("job-1") is True
+    assert await store.get("job-1") is None
+    assert await store.delete("job-1") is False
+
+
+def test_create_job_store_defaults_to_memory():
+    """Test that an empty URL selects the in-memory store."""
+    assert type(create_job_store("")) is JobStore
+
+
+def test_job_stores_share_the_base_interface():
+    """Test that both backends implement BaseJobStore, which cannot be used directly."""
+    assert issubclass(JobStore, BaseJobStore)
+    assert issubclass(RedisJobStore, BaseJobStore)
+    assert not issubclass(RedisJobStore, JobStore)
+    with pytest.raises(TypeError):
+        BaseJobStore()
@@ -1,32 +1,70 @@
+import io
 import pytest
-from unittest.mock import patch, mock_open
-from transcribe_meeting.output_utils import format_srt_time, save_to_txt, save_to_srt
+from transcribe_meeting.output_utils import format_srt_time, save_to_txt, save_to_srt, save_transcript_with_speakers, OUTPUT_BUFFER_SIZE
+from transcribe_meeting.alignment import WordRec
 
 # Test format_srt_time
-def test_format_srt_time():
-    assert format_srt_time(3661.123) == "01:01:01,123"
-    assert format_srt_time(0) == "00:00:00,000"
-    assert format_srt_time(None) == "00:00:00,000"
+@pytest.mark.parametrize("seconds,expected", [
+    (3661.123, "01:01:01,123"),
+    (0, "00:00:00,000"),
+    (None, "00:00:00,000"),
+])
+def test_format_srt_time(seconds, expected):
+    assert format_srt_time(seconds) == expected
+
+class _UnclosedStringIO(io.StringIO):
+    """StringIO that survives the writer's `with` block so its content can be checked."""
+    def close(self):
+        pass
+
+@pytest.fixture
+def open_buffer(monkeypatch):
+    """Route builtins.open to an in-memory buffer; returns the buffer and the open() calls."""
+    buffer = _UnclosedStringIO()
+    calls = []
+    def fake_open(*args, **kwargs):
+        calls.append((args, kwargs))
+        return buffer
+    monkeypatch.setattr("builtins.open", fake_open)
+    return buffer, calls
 
 # Test save_to_txt
-@patch("builtins.open", new_callable=mock_open)
-def test_save_to_txt(mock_file):
+def test_save_to_txt(open_buffer):
+    buffer, calls = open_buffer
     aligned_words = [
-        {"text": "Hello", "speaker": "SPEAKER_1"},
-        {"text": "world", "speaker": "SPEAKER_1"}
+        WordRec(start=0.0, end=1.0, text="Hello", word_index=0, speaker="SPEAKER_1"),
+        WordRec(start=1.1, end=2.0, text="world", word_index=1, speaker="SPEAKER_1")
     ]
     result = save_to_txt(aligned_words, "test.txt")
     assert result is True
-    mock_file.assert_called_once_with("test.txt", "w", encoding="utf-8")
+    assert calls == [(("test.txt", "w"), {"encoding": "utf-8", "buffering": OUTPUT_BUFFER_SIZE})]
+    assert buffer.getvalue() == "[SPEAKER_1]: Hello world\n"
 
 # Test save_to_srt
-@patch("builtins.open", new_callable=mock_open)
-def test_save_to_srt(mock_file):
+def test_save_to_srt(open_buffer):
+    buffer, calls = open_buffer
     aligned_words = [
-        {"start": 0.0, "end": 1.0, "text": "Hello", "speaker": "SPEAKER_1"},
-        {"start": 1.1, "end": 2.0, "text": "world", "speaker": "SPEAKER_1"}
+        WordRec(start=0.0, end=1.0, text="Hello", word_index=0, speaker="SPEAKER_1"),
+        WordRec(start=1.1, end=2.0, text="world", word_index=1, speaker="SPEAKER_1")
     ]
     srt_options = {"max_line_length": 42, "max_words_per_entry": 10, "speaker_gap_threshold": 1.0}
     result = save_to_srt(aligned_words, "test.srt", srt_options)
     assert result is True
-    mock_file.assert_called_once_with("test.srt", "w", encoding="utf-8")
\ No newline at end of file
+    assert calls == [(("test.srt", "w"), {"encoding": "utf-8", "buffering": OUTPUT_BUFFER_SIZE})]
+    assert buffer.getvalue().startswith("1\n00:00:00,000 --> 00:00:02,000\n[SPEAKER_1]: Hello world\n")
+
+def test_format_srt_time_edge_cases():
+    assert format_srt_time(59.999) == "00:00:59,999"
+    assert format_srt_time(360000.5) == "100:00:00,500"
+    assert format_srt_time(-1.0) == "00:00:00,000"
+    assert format_srt_time(float("nan")) == "00:00:00,000"
+
+def test_save_transcript_with_speakers_streams_generator(tmp_path):
+    aligned_words = [
+        WordRec(start=0.0, end=1.0, text="Hello", word_index=0, speaker="SPEAKER_1"),
+        WordRec(start=1.1, end=2.0, text="world", word_index=1, speaker="SPEAKER_1"),
+        WordRec(start=2.1, end=3.0, text="Hi", word_index=2, speaker="SPEAKER_2")
+    ]
+    output_path = tmp_path / "transcript.txt"
+    assert save_transcript_with_speakers((word for word in aligned_words), output_path) is True
+    assert output_path.read_text(encoding="utf-8") == "[SPEAKER_1]: Hello world\n[SPEAKER_2]: Hi\n"
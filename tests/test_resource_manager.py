@@ -1,43 +1,56 @@
 """Tests for the resource_manager module."""
 
-import sys
-from pathlib import Path
 import pytest
 from unittest.mock import patch, MagicMock
 
-# Add the src directory to path so we can import the package
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
-
 # Import the module under test
 from transcribe_meeting import resource_manager
 from transcribe_meeting import config
 
 
+pytestmark = pytest.mark.mockheavy
+
+
+@pytest.fixture(autouse=True)
+def clear_capability_cache():
+    """Reset cached GPU capability checks between tests."""
+    resource_manager.check_gpu_availability.cache_clear()
+    resource_manager.check_cudnn_availability.cache_clear()
+    resource_manager.get_physical_cpu_count.cache_clear()
+    resource_manager._gpu_memory_cache = None
+    yield
+    resource_manager.check_gpu_availability.cache_clear()
+    resource_manager.check_cudnn_availability.cache_clear()
+    resource_manager.get_physical_cpu_count.cache_clear()
+    resource_manager._gpu_memory_cache = None
+
+
+@pytest.fixture(scope="module")
+def torch_stub():
+    """Build the mock torch module once; mock_torch resets it for each test."""
+    return MagicMock()
+
+
 @pytest.fixture
-def mock_torch():
-    """Create a mock torch module for testing."""
-    with patch.object(resource_manager, "TORCH_AVAILABLE", True):
-        mock = MagicMock()
-        
-        # Setup CUDA mock
-        mock.cuda.is_available.return_value = True
-        mock.cuda.device_count.return_value = 2
-        
-        # Setup device properties
-        device_props = MagicMock()
-        device_props.total_memory = 8 * 1024 * 1024 * 1024  # 8 GB in bytes
-        mock.cuda.get_device_properties.return_value = device_props
-        
-        # Setup memory allocation mocks
-        mock.cuda.memory_reserved = lambda device: 1 * 1024 * 1024 * 1024  # 1 GB in bytes
-        
-        # Setup dtype mocks
-        mock.float16 = "float16"
-        mock.float32 = "float32"
-        mock.int8 = "int8"
-        
-        with patch.object(resource_manager, "torch", mock):
-            yield mock
+def mock_torch(torch_stub):
+    """Provide the shared mock torch module, reset to its defaults."""
+    torch_stub.reset_mock(return_value=True, side_effect=True)
+    
+    # Setup CUDA mock
+    torch_stub.cuda.is_available.return_value = True
+    torch_stub.cuda.device_count.return_value = 2
+    
+    # Setup driver memory info: 7 GB free of 8 GB
+    torch_stub.cuda.mem_get_info.return_value = (7 * 1024 * 1024 * 1024, 8 * 1024 * 1024 * 1024)
+    
+    # Setup dtype mocks
+    torch_stub.float16 = "float16"
+    torch_stub.float32 = "float32"
+    torch_stub.int8 = "int8"
+    
+    with patch.object(resource_manager, "TORCH_AVAILABLE", True), \
+         patch.object(resource_manager, "torch", torch_stub):
+        yield torch_stub
 
 
 def test_check_gpu_availability_with_torch(mock_torch):
@@ -52,6 +65,19 @@ def test_check_gpu_availability_without_torch():
         assert resource_manager.check_gpu_availability() is False
 
 
+def test_check_gpu_availability_is_cached(mock_torch):
+    """Test that CUDA is only probed once per process."""
+    assert resource_manager.check_gpu_availability() is True
+    assert resource_manager.check_gpu_availability() is True
+    mock_torch.cuda.is_available.assert_called_once()
+
+
+def test_check_cudnn_availability(mock_torch):
+    """Test cuDNN availability detection."""
+    mock_torch.backends.cudnn.is_available.return_value = True
+    assert resource_manager.check_cudnn_availability() is True
+
+
 def test_get_gpu_memory(mock_torch):
     """Test getting GPU memory."""
     memory_dict = resource_manager.get_gpu_memory()
@@ -61,12 +87,23 @@ def test_get_gpu_memory(mock_torch):
     assert 0 in memory_dict
     assert 1 in memory_dict
     
-    # Memory should be calculated correctly (total * 0.9 - allocated, converted to MB)
-    expected_memory = (8 * 0.9 - 1) * 1024  # (8 GB * 0.9 - 1 GB) in MB
+    # Memory should be calculated correctly (free * 0.9, converted to MB)
+    expected_memory = 7 * 0.9 * 1024  # (7 GB * 0.9) in MB
     assert memory_dict[0] == int(expected_memory)
     assert memory_dict[1] == int(expected_memory)
 
 
+def test_get_gpu_memory_cached_until_cleanup(mock_torch):
+    """Test that GPU memory is queried once until cleanup_gpu_memory invalidates it."""
+    resource_manager.get_gpu_memory()
+    resource_manager.get_gpu_memory()
+    assert mock_torch.cuda.mem_get_info.call_count == 2  # once per GPU
+    
+    resource_manager.cleanup_gpu_memory()
+    resource_manager.get_gpu_memory()
+    assert mock_torch.cuda.mem_get_info.call_count == 4
+
+
 def test_get_gpu_memory_no_torch():
     """Test getting GPU memory when torch is not available."""
     with patch.object(resource_manager, "TORCH_AVAILABLE", False):
@@ -85,14 +122,12 @@ def test_select_device_prefers_config(mock_torch):
 
 def test_select_device_selects_best_gpu(mock_torch):
     """Test that select_device selects the GPU with the most available memory."""
-    with patch.object(config, "WHISPER_DEVICE", "cuda"):
-        with patch.object(config, "GPU_MEMORY_THRESHOLD_MB", 1000):
-            # Mock get_gpu_memory to return different memory for each GPU
-            with patch.object(resource_manager, "get_gpu_memory", 
-                             return_value={0: 2000, 1: 4000}):
-                device = resource_manager.select_device()
-                # Should select GPU 1 which has more memory
-                assert device == "cuda:1"
+    # Mock get_gpu_memory to return different memory for each GPU
+    with patch.multiple(config, WHISPER_DEVICE="cuda", GPU_MEMORY_THRESHOLD_MB=1000), \
+         patch.object(resource_manager, "get_gpu_memory", return_value={0: 2000, 1: 4000}):
+        device = resource_manager.select_device()
+        # Should select GPU 1 which has more memory
+        assert device == "cuda:1"
 
 
 def test_select_device_falls_back_to_cpu_when_no_gpu(mock_torch):
@@ -105,14 +140,12 @@ def test_select_device_falls_back_to_cpu_when_no_gpu(mock_torch):
 
 def test_select_device_falls_back_to_cpu_when_insufficient_memory(mock_torch):
     """Test that select_device falls back to CPU when GPU memory is insufficient."""
-    with patch.object(config, "WHISPER_DEVICE", "cuda"):
-        with patch.object(config, "GPU_MEMORY_THRESHOLD_MB", 10000):
-            # Mock get_gpu_memory to return insufficient memory
-            with patch.object(resource_manager, "get_gpu_memory", 
-                             return_value={0: 2000, 1: 5000}):
-                device = resource_manager.select_device()
-                # Should fall back to CPU since neither GPU has enough memory
-                assert device == "cpu"
+    # Mock get_gpu_memory to return insufficient memory
+    with patch.multiple(config, WHISPER_DEVICE="cuda", GPU_MEMORY_THRESHOLD_MB=10000), \
+         patch.object(resource_manager, "get_gpu_memory", return_value={0: 2000, 1: 5000}):
+        device = resource_manager.select_device()
+        # Should fall back to CPU since neither GPU has enough memory
+        assert device == "cpu"
 
 
 def test_cleanup_gpu_memory(mock_torch):
@@ -123,16 +156,19 @@ def test_cleanup_gpu_memory(mock_torch):
 
 def test_cleanup_gpu_memory_handles_error(mock_torch):
     """Test that cleanup_gpu_memory handles exceptions gracefully."""
-    mock_torch.cuda.empty_cache.side_effect = RuntimeError("Test error")
+    mock_torch.cuda.empty_cache.side_effect = RuntimeError
     # Should not raise an exception
     resource_manager.cleanup_gpu_memory()
 
 
-def test_get_torch_dtype(mock_torch):
+@pytest.mark.parametrize("compute_type,expected", [
+    ("float16", "float16"),
+    ("float32", "float32"),
+    ("int8", "int8"),
+])
+def test_get_torch_dtype(mock_torch, compute_type, expected):
     """Test getting torch dtype based on compute type."""
-    assert resource_manager.get_torch_dtype("float16") == "float16"
-    assert resource_manager.get_torch_dtype("float32") == "float32"
-    assert resource_manager.get_torch_dtype("int8") == "int8"
+    assert resource_manager.get_torch_dtype(compute_type) == expected
 
 
 def test_get_torch_dtype_invalid():
@@ -146,4 +182,14 @@ def test_get_torch_dtype_no_torch():
     """Test that get_torch_dtype raises ImportError when torch is not available."""
     with patch.object(resource_manager, "TORCH_AVAILABLE", False):
         with pytest.raises(ImportError):
-            resource_manager.get_torch_dtype("float16")
\ No newline at end of file
+            resource_manager.get_torch_dtype("float16")
+
+def test_get_physical_cpu_count_capped_by_config():
+    """Test that the physical core count is capped by CPU_THREADS."""
+    mock_psutil = MagicMock()
+    mock_psutil.cpu_count.return_value = 16
+    with patch.object(resource_manager, "psutil", mock_psutil, create=True), \
+         patch.object(resource_manager, "PSUTIL_AVAILABLE", True), \
+         patch.object(resource_manager.config, "CPU_THREADS", 8):
+        assert resource_manager.get_physical_cpu_count() == 8
+    mock_psutil.cpu_count.assert_called_once_with(logical=False)
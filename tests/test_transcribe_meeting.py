@@ -1,223 +1,401 @@
-"""Tests for the main transcribe_meeting module."""
+"""Tests for the transcribe_meeting_script command-line entry point."""
 
+import logging
 import sys
+import threading
 import os
 from pathlib import Path
 import pytest
+from contextlib import ExitStack
+from types import MappingProxyType
 from unittest.mock import patch, MagicMock, call
-from typing import Dict, Any
-
-# Add the src directory to path so we can import the package
-sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+from typing import Dict, Any, List
 
 # Import the module under test
-from transcribe_meeting import transcribe_meeting
+from transcribe_meeting import transcribe_meeting_script as transcribe_meeting
+# Bound before _patched_modules replaces them on the script module
+from transcribe_meeting.transcribe_meeting_script import check_and_get_huggingface_token, load_diarization_pipeline_with_retries
+# main() imports these lazily from the package, so they are patched as package attributes
+from transcribe_meeting import audio_utils, file_manager, diarizer, transcriber, alignment, output_utils, resource_manager
+
+
+pytestmark = pytest.mark.mockheavy
+
+
+# Attributes replaced for every test; patched once per module by _patched_modules.
+# ModelManager is patched on the transcriber module itself (main imports it by name)
+# before the package's `transcriber` attribute is replaced for process_one.
+PATCH_TARGETS = {
+    "setup_logging": "transcribe_meeting.transcribe_meeting_script.setup_logging",
+    "get_token": "transcribe_meeting.transcribe_meeting_script.check_and_get_huggingface_token",
+    "load_diarization": "transcribe_meeting.transcribe_meeting_script.load_diarization_pipeline_with_retries",
+    "model_manager": "transcribe_meeting.transcriber.ModelManager",
+    "file_manager": "transcribe_meeting.file_manager",
+    "audio_utils": "transcribe_meeting.audio_utils",
+    "diarizer": "transcribe_meeting.diarizer",
+    "transcriber": "transcribe_meeting.transcriber",
+    "alignment": "transcribe_meeting.alignment",
+    "output_utils": "transcribe_meeting.output_utils",
+    "resource_manager": "transcribe_meeting.resource_manager",
+}
+
+
+# Default mock results, shared read-only across tests
+_CALCULATE_PATHS_RESULT = MappingProxyType({
+    "video_path": "/path/to/video.mp4",
+    "audio_file": "/path/to/audio.wav",
+    "transcript_subdir": "/path/to/transcripts",
+    "output_txt_file": "/path/to/transcripts/video_transcript.txt",
+    "processed_video_path": "/path/to/processed/video.mp4",
+})
+# configure_mock() settings applied to the patched modules in one call each
+_AUDIO_UTILS_CONFIG = MappingProxyType({
+    "extract_audio.return_value": True,
+    "load_wav_as_float32.return_value": "audio_samples",
+})
+_DIARIZER_CONFIG = MappingProxyType({
+    "run_diarization.return_value": "diarization_result",
+    "extract_speaker_turn_arrays.return_value": ("speaker1", "speaker2"),
+})
+_TRANSCRIBER_CONFIG = MappingProxyType({
+    "transcribe_segments.return_value": ("segment1", "segment2"),
+})
+_ALIGNMENT_CONFIG = MappingProxyType({
+    "iter_aligned_words.return_value": ("aligned_word1", "aligned_word2"),
+})
+_OUTPUT_UTILS_CONFIG = MappingProxyType({
+    "save_transcript_with_speakers.return_value": True,
+})
+
+
+def _configure_mocks(mocks: Dict[str, MagicMock]) -> None:
+    """Apply the default return values shared by all tests."""
+    # Setup mock token lookup and diarization pipeline loader
+    mocks["get_token"].return_value = "hf_token"
+    mocks["load_diarization"].return_value = "diarization_pipeline"
+
+    # Setup mock file_manager
+    mocks["file_manager"].calculate_paths.return_value = _CALCULATE_PATHS_RESULT
+
+    # Setup mock audio_utils
+    mocks["audio_utils"].configure_mock(**_AUDIO_UTILS_CONFIG)
+
+    # Setup mock ModelManager
+    mocks["model_manager"].return_value.__enter__.return_value = MagicMock(pipeline="whisper_pipeline")
+
+    # Setup mock diarizer, transcriber, alignment and output
+    mocks["diarizer"].configure_mock(**_DIARIZER_CONFIG)
+    mocks["transcriber"].configure_mock(**_TRANSCRIBER_CONFIG)
+    mocks["alignment"].configure_mock(**_ALIGNMENT_CONFIG)
+    mocks["output_utils"].configure_mock(**_OUTPUT_UTILS_CONFIG)
+
+
+@pytest.fixture(scope="module")
+def _patched_modules() -> Dict[str, MagicMock]:
+    """Patch the module's dependencies once for the whole test module."""
+    with ExitStack() as stack:
+        yield {name: stack.enter_context(patch(target)) for name, target in PATCH_TARGETS.items()}
 
 
 @pytest.fixture
-def mock_setup() -> Dict[str, MagicMock]:
+def mock_setup(_patched_modules: Dict[str, MagicMock]) -> Dict[str, MagicMock]:
     """Set up common mocks for tests.
-    
+
+    The patches are shared across the module; each test gets them reset, including
+    any return values or side effects a previous test set, and reconfigured.
+
     Returns:
         Dict[str, MagicMock]: Dictionary containing all mocked dependencies:
             - setup_logging: Mock for logging setup
+            - get_token: Mock for the Hugging Face token lookup
+            - load_diarization: Mock for loading the diarization pipeline
+            - model_manager: Mock for ML model management
             - file_manager: Mock for file operations
             - audio_utils: Mock for audio processing
-            - model_manager: Mock for ML model management
             - diarizer: Mock for speaker diarization
             - transcriber: Mock for transcription
             - alignment: Mock for word alignment
             - output_utils: Mock for output handling
+            - resource_manager: Mock for GPU cleanup
     """
-    with patch("transcribe_meeting.transcribe_meeting.setup_logging") as mock_setup_logging, \
-         patch("transcribe_meeting.transcribe_meeting.file_manager") as mock_file_manager, \
-         patch("transcribe_meeting.transcribe_meeting.audio_utils") as mock_audio_utils, \
-         patch("transcribe_meeting.transcribe_meeting.ModelManager") as mock_model_manager, \
-         patch("transcribe_meeting.transcribe_meeting.diarizer") as mock_diarizer, \
-         patch("transcribe_meeting.transcribe_meeting.transcriber") as mock_transcriber, \
-         patch("transcribe_meeting.transcribe_meeting.alignment") as mock_alignment, \
-         patch("transcribe_meeting.transcribe_meeting.output_utils") as mock_output_utils:
-         
-        # Setup mock file_manager
-        mock_file_manager.calculate_paths.return_value = {
-            "video_path": "/path/to/video.mp4",
-            "audio_file": "/path/to/audio.wav",
-            "transcript_subdir": "/path/to/transcripts",
-            "output_txt_file": "/path/to/transcripts/video_transcript.txt",
-            "processed_video_path": "/path/to/processed/video.mp4",
-        }
-        
-        # Setup mock audio_utils
-        mock_audio_utils.extract_audio.return_value = True
-        
-        # Setup mock ModelManager
-        mock_model_instance = MagicMock()
-        mock_model_manager.return_value.__enter__.return_value = mock_model_instance
-        
-        # Setup mock diarizer
-        mock_diarizer.load_diarization_pipeline.return_value = "diarization_pipeline"
-        mock_diarizer.run_diarization.return_value = "diarization_result"
-        mock_diarizer.extract_speaker_turns.return_value = ["speaker1", "speaker2"]
-        
-        # Setup mock transcriber
-        mock_transcriber.run_transcription.return_value = (["segment1", "segment2"], {})
-        
-        # Setup mock alignment
-        mock_alignment.align_words_with_speakers.return_value = ["aligned_word1", "aligned_word2"]
-        
-        yield {
-            "setup_logging": mock_setup_logging,
-            "file_manager": mock_file_manager,
-            "audio_utils": mock_audio_utils,
-            "model_manager": mock_model_manager,
-            "diarizer": mock_diarizer,
-            "transcriber": mock_transcriber,
-            "alignment": mock_alignment,
-            "output_utils": mock_output_utils,
-        }
+    for mock in _patched_modules.values():
+        mock.reset_mock(return_value=True, side_effect=True)
+    _configure_mocks(_patched_modules)
+    return _patched_modules
+
+
+DEFAULT_ARGV = ["video.mp4"]
 
 
 @pytest.fixture
-def mock_args() -> None:
-    """Mock command line arguments for testing.
-    
-    Sets up sys.argv with a default test video path.
+def cli(monkeypatch, request, tmp_path) -> List[str]:
+    """Set sys.argv for the test and return the video paths on it.
+
+    Uses DEFAULT_ARGV unless the test parametrizes `cli` indirectly with its own
+    arguments. File names are created under tmp_path, except those starting with
+    "missing"; arguments starting with "-" are passed through as flags.
     """
-    with patch("sys.argv", ["transcribe_meeting", "/path/to/video.mp4"]):
-        yield
+    video_paths = []
+    argv = ["transcribe_meeting"]
+    for arg in getattr(request, "param", DEFAULT_ARGV):
+        if arg.startswith("-"):
+            argv.append(arg)
+            continue
+        video_path = tmp_path / arg
+        if not arg.startswith("missing"):
+            video_path.touch()
+        video_paths.append(str(video_path))
+        argv.append(str(video_path))
+    monkeypatch.setattr("sys.argv", argv)
+    return video_paths
 
 
-def test_setup_logging() -> None:
+def test_setup_logging(tmp_path, monkeypatch) -> None:
     """Test the setup_logging function.
-    
+
     Verifies that logging is configured with both console and file handlers.
     """
-    with patch("transcribe_meeting.transcribe_meeting.logging") as mock_logging:
+    from transcribe_meeting import logging_utils
+
+    monkeypatch.chdir(tmp_path)
+    with patch.object(logging_utils, "logging") as mock_logging, \
+         patch.object(logging_utils, "RotatingFileHandler") as mock_file_handler:
         # Call the function
-        transcribe_meeting.setup_logging()
-        
+        logging_utils.setup_logging()
+
         # Check that root logger was configured
         mock_logging.getLogger.assert_called_once()
         mock_logging.StreamHandler.assert_called_once()
-        
+
         # Check that file handler was added
-        mock_logging.RotatingFileHandler.assert_called_once()
-        
+        mock_file_handler.assert_called_once()
+
         # Check that both handlers were added to the logger
         root_logger = mock_logging.getLogger.return_value
         assert root_logger.addHandler.call_count == 2
 
 
-def test_main_successful_processing(mock_setup: Dict[str, MagicMock], mock_args: None) -> None:
+def test_main_successful_processing(mock_setup: Dict[str, MagicMock], cli: List[str]) -> None:
     """Test successful end-to-end processing in the main function.
-    
+
     Args:
         mock_setup: Dictionary of mocked dependencies
-        mock_args: Mocked command line arguments
-        
-    Verifies that all processing steps are called in the correct order.
+        cli: Video paths passed on the command line
+
+    Verifies that every processing step runs once and the outputs are cleaned up.
     """
-    # Mock sys.exit to prevent the test from actually exiting
-    with patch("sys.exit"):
-        # Run main
-        transcribe_meeting.main()
-        
-        # Verify the correct sequence of operations
-        mock_setup["setup_logging"].assert_called_once()
-        mock_setup["file_manager"].calculate_paths.assert_called_once()
-        mock_setup["file_manager"].create_directories.assert_called_once()
-        mock_setup["audio_utils"].extract_audio.assert_called_once()
-        mock_setup["model_manager"].assert_called_once()
-        mock_setup["diarizer"].load_diarization_pipeline.assert_called_once()
-        mock_setup["diarizer"].run_diarization.assert_called_once()
-        mock_setup["diarizer"].extract_speaker_turns.assert_called_once()
-        mock_setup["transcriber"].run_transcription.assert_called_once()
-        mock_setup["alignment"].align_words_with_speakers.assert_called_once()
-        mock_setup["output_utils"].save_transcript_with_speakers.assert_called_once()
-        
-        # Check cleanup actions
-        mock_setup["file_manager"].move_video.assert_called_once()
-        mock_setup["file_manager"].delete_temp_audio.assert_called_once()
-
-
-def test_main_file_not_found(mock_setup):
+    assert transcribe_meeting.main() is True
+
+    # Verify the sequence of operations
+    mock_setup["setup_logging"].assert_called_once()
+    mock_setup["file_manager"].calculate_paths.assert_called_once()
+    mock_setup["file_manager"].create_directories.assert_called_once()
+    mock_setup["audio_utils"].extract_audio.assert_called_once()
+    mock_setup["model_manager"].assert_called_once()
+    mock_setup["load_diarization"].assert_called_once_with("hf_token")
+    mock_setup["diarizer"].run_diarization.assert_called_once_with("diarization_pipeline", "audio_samples")
+    mock_setup["diarizer"].extract_speaker_turn_arrays.assert_called_once()
+    mock_setup["transcriber"].transcribe_segments.assert_called_once_with("whisper_pipeline", "audio_samples")
+    mock_setup["alignment"].iter_aligned_words.assert_called_once()
+    mock_setup["output_utils"].save_transcript_with_speakers.assert_called_once()
+
+    # Check cleanup actions
+    mock_setup["file_manager"].move_video.assert_called_once()
+    mock_setup["file_manager"].delete_temp_audio.assert_called_once()
+
+
+@pytest.mark.parametrize("cli", [["missing.mp4"]], indirect=True)
+def test_main_file_not_found(mock_setup, cli):
     """Test handling of file not found error."""
-    with patch("sys.argv", ["transcribe_meeting", "/nonexistent/video.mp4"]), \
-         patch("pathlib.Path.exists", return_value=False), \
-         patch("sys.exit") as mock_exit:
-        
-        # Run main
+    with pytest.raises(SystemExit) as exit_info:
         transcribe_meeting.main()
-        
-        # Should exit with error
-        mock_exit.assert_called_once_with(1)
-        
-        # Should not proceed to processing
-        mock_setup["file_manager"].create_directories.assert_not_called()
-        mock_setup["audio_utils"].extract_audio.assert_not_called()
 
+    # Should exit with error
+    assert exit_info.value.code == 1
+
+    # Should not proceed to processing
+    mock_setup["file_manager"].create_directories.assert_not_called()
+    mock_setup["audio_utils"].extract_audio.assert_not_called()
 
-def test_main_audio_extraction_failure(mock_setup, mock_args):
+
+def test_main_audio_extraction_failure(mock_setup, cli):
     """Test handling of audio extraction failure."""
     # Setup audio extraction to fail
     mock_setup["audio_utils"].extract_audio.return_value = False
-    
-    with patch("sys.exit") as mock_exit:
-        # Run main
-        transcribe_meeting.main()
-        
-        # Should exit with error
-        mock_exit.assert_called_once_with(1)
-        
-        # Should not proceed to model loading
-        mock_setup["model_manager"].__enter__.assert_not_called()
 
+    assert transcribe_meeting.main() is False
 
-def test_main_diarization_failure(mock_setup, mock_args):
+    # Should not go on to the models
+    mock_setup["transcriber"].transcribe_segments.assert_not_called()
+    mock_setup["diarizer"].run_diarization.assert_not_called()
+
+
+def test_main_diarization_failure(mock_setup, cli):
     """Test handling of diarization failure."""
     # Setup diarization to fail
     mock_setup["diarizer"].run_diarization.return_value = None
-    
-    # Run main, it should catch the ValueError
-    result = transcribe_meeting.main()
-    
+
     # Should return False to indicate failure
-    assert result is False
-    
+    assert transcribe_meeting.main() is False
+
     # Should not move the video or delete audio on failure
     mock_setup["file_manager"].move_video.assert_not_called()
     mock_setup["file_manager"].delete_temp_audio.assert_not_called()
 
 
-def test_main_with_verbose_flag(mock_setup):
-    """Test main function with verbose flag."""
-    with patch("sys.argv", ["transcribe_meeting", "/path/to/video.mp4", "--verbose"]), \
-         patch("sys.exit"):
-        
-        # Run main
-        transcribe_meeting.main()
-        
-        # Should set up logging with DEBUG level
-        mock_setup["setup_logging"].assert_has_calls([
-            call(),  # First call with default level
-            call(level=10)  # Second call with DEBUG level (10)
-        ])
+@pytest.mark.parametrize("cli,level", [
+    (DEFAULT_ARGV + ["--verbose"], logging.DEBUG),
+    (DEFAULT_ARGV, logging.INFO),
+], indirect=["cli"])
+def test_main_configures_logging_once(mock_setup, cli, level):
+    """Test that logging is configured exactly once, at the level the flags ask for."""
+    transcribe_meeting.main()
+
+    mock_setup["setup_logging"].assert_called_once_with(level)
 
 
-def test_main_handles_exception(mock_setup, mock_args):
+def test_main_handles_exception(mock_setup, cli):
     """Test that main handles exceptions gracefully."""
-    # Setup diarizer to raise an exception
-    mock_setup["diarizer"].load_diarization_pipeline.side_effect = Exception("Test error")
-    
-    with patch("transcribe_meeting.transcribe_meeting.logging.exception") as mock_log_exception:
+    # Setup the diarization pipeline load to raise an exception
+    mock_setup["load_diarization"].side_effect = Exception("Test error")
+
+    with patch("transcribe_meeting.transcribe_meeting_script.logging.exception") as mock_log_exception:
         # Run main
         result = transcribe_meeting.main()
-        
+
         # Should log the exception
         mock_log_exception.assert_called_once()
-        
+
         # Should return False to indicate failure
         assert result is False
-        
+
         # Should not clean up on failure
-        mock_setup["file_manager"].move_video.assert_not_called()
\ No newline at end of file
+        mock_setup["file_manager"].move_video.assert_not_called()
+
+
+@pytest.mark.parametrize("cli", [["first.mp4", "second.mp4", "third.mp4"]], indirect=True)
+def test_main_loads_models_once_for_all_videos(mock_setup, cli):
+    """Test that several videos share one Whisper and one diarization load."""
+    assert transcribe_meeting.main() is True
+
+    mock_setup["model_manager"].assert_called_once()
+    mock_setup["load_diarization"].assert_called_once()
+    assert mock_setup["transcriber"].transcribe_segments.call_count == 3
+    assert mock_setup["output_utils"].save_transcript_with_speakers.call_count == 3
+    assert mock_setup["resource_manager"].cleanup_gpu_memory.call_count == 3
+
+
+@pytest.mark.parametrize("cli", [["first.mp4", "missing.mp4", "second.mp4", "third.mp4"]], indirect=True)
+def test_main_skips_missing_and_failing_videos(mock_setup, cli):
+    """Test that a missing or failing video is skipped, the rest are processed, and the run fails."""
+    # The second existing video fails diarization
+    mock_setup["diarizer"].run_diarization.side_effect = ["diarization_result", None, "diarization_result"]
+
+    assert transcribe_meeting.main() is False
+
+    assert mock_setup["diarizer"].run_diarization.call_count == 3
+    assert mock_setup["output_utils"].save_transcript_with_speakers.call_count == 2
+    assert [c.args[0] for c in mock_setup["file_manager"].move_video.call_args_list] == [cli[0], cli[3]]
+
+
+@pytest.mark.parametrize("cli", [["missing1.mp4", "missing2.mp4"]], indirect=True)
+def test_main_exits_when_every_video_is_missing(mock_setup, cli):
+    """Test that a run with no existing videos exits with 1 before loading any model."""
+    with pytest.raises(SystemExit) as exit_info:
+        transcribe_meeting.main()
+
+    assert exit_info.value.code == 1
+    mock_setup["model_manager"].assert_not_called()
+    mock_setup["load_diarization"].assert_not_called()
+
+
+@patch("transcribe_meeting.transcribe_meeting_script.time.sleep")
+@patch("pyannote.audio.Pipeline.from_pretrained")
+def test_load_diarization_pipeline_with_retries_gives_up(mock_from_pretrained, mock_sleep):
+    """Test that the diarization load is attempted max_retries times before failing."""
+    mock_from_pretrained.side_effect = Exception("Hub unavailable")
+
+    with pytest.raises(ValueError):
+        load_diarization_pipeline_with_retries("hf_token", max_retries=3, retry_delay=7)
+
+    assert mock_from_pretrained.call_count == 3
+    assert mock_sleep.call_args_list == [call(7), call(7)]
+
+
+@patch("transcribe_meeting.transcribe_meeting_script.time.sleep")
+@patch("pyannote.audio.Pipeline.from_pretrained")
+def test_load_diarization_pipeline_with_retries_recovers(mock_from_pretrained, mock_sleep):
+    """Test that a transient failure is retried and the loaded pipeline returned."""
+    mock_from_pretrained.side_effect = [Exception("Hub unavailable"), "diarization_pipeline"]
+
+    assert load_diarization_pipeline_with_retries("hf_token", max_retries=3) == "diarization_pipeline"
+    assert mock_from_pretrained.call_count == 2
+    mock_sleep.assert_called_once()
+
+
+@pytest.mark.parametrize("cli", [["first.mp4", "second.mp4"]], indirect=True)
+def test_main_prepares_next_video_during_processing(mock_setup, cli):
+    """Test that the next video's audio is extracted while the current one is on the models."""
+    second_extracted = threading.Event()
+    next_ready_during_diarization = []
+
+    def extract_audio(video_path, audio_file):
+        if video_path == cli[1]:
+            second_extracted.set()
+        return True
+
+    def run_diarization(pipeline, audio):
+        # Blocks the first video's processing until the prefetch thread reaches the second
+        next_ready_during_diarization.append(second_extracted.wait(timeout=5))
+        return "diarization_result"
+
+    mock_setup["audio_utils"].extract_audio.side_effect = extract_audio
+    mock_setup["diarizer"].run_diarization.side_effect = run_diarization
+
+    assert transcribe_meeting.main() is True
+    assert next_ready_during_diarization == [True, True]
+
+
+@pytest.mark.parametrize("cli", [["first.mp4", "second.mp4"]], indirect=True)
+def test_main_skips_processing_when_preparation_fails(mock_setup, cli):
+    """Test that a video prepare_one rejects counts as failed and never reaches process_one."""
+    mock_setup["audio_utils"].extract_audio.side_effect = lambda video_path, audio_file: video_path != cli[0]
+
+    with patch("transcribe_meeting.transcribe_meeting_script.process_one", return_value=True) as mock_process_one:
+        assert transcribe_meeting.main() is False
+
+    mock_process_one.assert_called_once()
+    assert mock_process_one.call_args.args[2] == cli[1]
+
+
+def test_huggingface_token_from_environment(monkeypatch, tmp_path):
+    """Test that HUGGINGFACE_AUTH_TOKEN wins over the token file."""
+    token_file = tmp_path / "token"
+    token_file.write_text("file_token\n", encoding="utf-8")
+    monkeypatch.setattr(transcribe_meeting, "HUGGINGFACE_TOKEN_FILE", token_file)
+    monkeypatch.setenv("HUGGINGFACE_AUTH_TOKEN", "env_token")
+
+    assert check_and_get_huggingface_token() == "env_token"
+
+
+def test_huggingface_token_from_token_file(monkeypatch, tmp_path):
+    """Test that the `huggingface-cli login` token file is used when the variable is unset."""
+    token_file = tmp_path / "token"
+    token_file.write_text("file_token\n", encoding="utf-8")
+    monkeypatch.setattr(transcribe_meeting, "HUGGINGFACE_TOKEN_FILE", token_file)
+    monkeypatch.delenv("HUGGINGFACE_AUTH_TOKEN", raising=False)
+
+    assert check_and_get_huggingface_token() == "file_token"
+
+
+def test_huggingface_token_missing_without_tty(monkeypatch, tmp_path):
+    """Test that a non-interactive run without a token fails fast instead of prompting."""
+    monkeypatch.setattr(transcribe_meeting, "HUGGINGFACE_TOKEN_FILE", tmp_path / "missing_token")
+    monkeypatch.delenv("HUGGINGFACE_AUTH_TOKEN", raising=False)
+    monkeypatch.setattr("sys.stdin", MagicMock(isatty=MagicMock(return_value=False)))
+
+    with patch("builtins.input") as mock_input:
+        with pytest.raises(ValueError):
+            check_and_get_huggingface_token()
+
+    mock_input.assert_not_called()
@@ -1,37 +1,168 @@
+import os
+import numpy as np
 import pytest
 from unittest.mock import patch, MagicMock
-from transcribe_meeting.transcriber import ModelManager, load_whisper_model, run_transcription
+from transcribe_meeting.transcriber import ModelManager, load_whisper_model, run_transcription, transcribe_segments, warm_up
 
-@patch("transcribe_meeting.transcriber.WhisperModel")
-def test_model_manager_success(mock_whisper_model):
-    with ModelManager("large-v3", "cuda", "float16") as model:
-        assert model == mock_whisper_model.return_value
+@pytest.fixture(scope="module")
+def _patched_model_classes():
+    """Patch WhisperModel and BatchedInferencePipeline once for the module, so no test loads a real model."""
+    with patch("transcribe_meeting.transcriber.WhisperModel") as model_cls, \
+         patch("transcribe_meeting.transcriber.BatchedInferencePipeline") as pipeline_cls:
+        yield model_cls, pipeline_cls
+
+@pytest.fixture(autouse=True)
+def whisper_model(_patched_model_classes):
+    """The patched WhisperModel class, reset for each test."""
+    model_cls = _patched_model_classes[0]
+    model_cls.reset_mock(return_value=True, side_effect=True)
+    return model_cls
+
+@pytest.fixture(autouse=True)
+def batched_pipeline(_patched_model_classes):
+    """The patched BatchedInferencePipeline class, reset for each test."""
+    pipeline_cls = _patched_model_classes[1]
+    pipeline_cls.reset_mock(return_value=True, side_effect=True)
+    return pipeline_cls
 
-@patch("transcribe_meeting.transcriber.WhisperModel")
-def test_model_manager_failure(mock_whisper_model):
-    mock_whisper_model.side_effect = Exception("Failed to load model")
+def test_model_manager_success(whisper_model, batched_pipeline):
+    with ModelManager("large-v3", "cuda", "float16") as manager:
+        assert manager.model == whisper_model.return_value
+        assert manager.pipeline == batched_pipeline.return_value
+        batched_pipeline.assert_called_once_with(model=whisper_model.return_value)
+    assert manager.pipeline is None and manager.model is None
+
+def test_model_manager_failure(whisper_model):
+    whisper_model.side_effect = Exception("Failed to load model")
     with ModelManager("large-v3", "cuda", "float16") as model:
         assert model is None
 
-@patch("transcribe_meeting.transcriber.WhisperModel")
-def test_load_whisper_model_success(mock_whisper_model):
+def test_load_whisper_model_success(whisper_model):
     result = load_whisper_model("large-v3", "cuda", "float16")
-    assert result == mock_whisper_model.return_value
+    assert result == whisper_model.return_value
 
-@patch("transcribe_meeting.transcriber.WhisperModel")
-def test_load_whisper_model_failure(mock_whisper_model):
-    mock_whisper_model.side_effect = Exception("Failed to load model")
+def test_load_whisper_model_failure(whisper_model):
+    whisper_model.side_effect = Exception("Failed to load model")
     result = load_whisper_model("large-v3", "cuda", "float16")
     assert result is None
 
-@patch("transcribe_meeting.transcriber.BatchedInferencePipeline")
-def test_run_transcription_success(mock_pipeline):
-    mock_pipeline.return_value.transcribe.return_value = ("segments", MagicMock(language="en", language_probability=0.95))
+def test_run_transcription_success():
+    mock_pipeline = MagicMock()
+    mock_pipeline.transcribe.return_value = ("segments", MagicMock(language="en", language_probability=0.95))
     result = run_transcription(mock_pipeline, "test_audio.wav")
-    assert result == ("segments", mock_pipeline.return_value.transcribe.return_value[1])
+    assert result == ("segments", mock_pipeline.transcribe.return_value[1])
 
-@patch("transcribe_meeting.transcriber.BatchedInferencePipeline")
-def test_run_transcription_failure(mock_pipeline):
-    mock_pipeline.return_value.transcribe.side_effect = Exception("Transcription failed")
+def test_run_transcription_failure():
+    mock_pipeline = MagicMock()
+    mock_pipeline.transcribe.side_effect = Exception("Transcription failed")
     result = run_transcription(mock_pipeline, "test_audio.wav")
-    assert result == (None, None)
\ No newline at end of file
+    assert result == (None, None)
+
+def test_load_whisper_model_quantizes_weights(whisper_model):
+    load_whisper_model("large-v3", "cpu", "float32")
+    assert whisper_model.call_args.kwargs["compute_type"] == "int8"
+
+    load_whisper_model("large-v3", "cuda", "float16")
+    assert whisper_model.call_args.kwargs["compute_type"] == "int8_float16"
+
+    load_whisper_model("large-v3", "cuda", "float16", quantize=False)
+    assert whisper_model.call_args.kwargs["compute_type"] == "float16"
+
+@pytest.mark.parametrize("supported", [True, False])
+def test_run_transcription_vad_options(supported):
+    mock_pipeline = MagicMock()
+    mock_pipeline.transcribe.return_value = ("segments", None)
+    with patch("transcribe_meeting.transcriber.VAD_BATCH_SUPPORTED", supported):
+        run_transcription(mock_pipeline, "test_audio.wav")
+    kwargs = mock_pipeline.transcribe.call_args.kwargs
+    assert kwargs["vad_filter"] is True
+    assert kwargs["vad_parameters"] == {"threshold": 0.5}
+    assert ("vad_batch_size" in kwargs) == supported
+
+def test_transcribe_segments_materializes_generator():
+    mock_pipeline = MagicMock()
+    mock_pipeline.transcribe.return_value = (iter(["segment1", "segment2"]), None)
+    assert transcribe_segments(mock_pipeline, "test_audio.wav") == ["segment1", "segment2"]
+
+    mock_pipeline.transcribe.side_effect = Exception("Transcription failed")
+    assert transcribe_segments(mock_pipeline, "test_audio.wav") is None
+
+def test_load_whisper_model_sets_cuda_allocator(monkeypatch):
+    monkeypatch.delenv("CT2_CUDA_ALLOCATOR", raising=False)
+    load_whisper_model("large-v3", "cpu", "float32")
+    assert "CT2_CUDA_ALLOCATOR" not in os.environ
+
+    load_whisper_model("large-v3", "cuda", "float16")
+    assert os.environ["CT2_CUDA_ALLOCATOR"] == "cub_caching"
+
+    monkeypatch.setenv("CT2_CUDA_ALLOCATOR", "cuda_malloc_async")
+    load_whisper_model("large-v3", "cuda", "float16")
+    assert os.environ["CT2_CUDA_ALLOCATOR"] == "cuda_malloc_async"
+
+@patch("transcribe_meeting.transcriber.resource_manager.get_physical_cpu_count", return_value=8)
+def test_load_whisper_model_thread_settings(mock_cores, whisper_model):
+    load_whisper_model("large-v3", "cpu", "int8", num_workers=2)
+    assert whisper_model.call_args.kwargs["cpu_threads"] == 4
+    assert whisper_model.call_args.kwargs["num_workers"] == 2
+
+    load_whisper_model("large-v3", "cpu", "int8", cpu_threads=3)
+    assert whisper_model.call_args.kwargs["cpu_threads"] == 3
+    assert whisper_model.call_args.kwargs["num_workers"] == 1
+
+def test_load_whisper_model_resolves_hub_repo(whisper_model):
+    load_whisper_model("distil-large-v3", "cpu", "int8")
+    assert whisper_model.call_args.args[0] == "Systran/faster-distil-whisper-large-v3"
+
+    load_whisper_model("small", "cpu", "int8")
+    assert whisper_model.call_args.args[0] == "small"
+
+@patch("transcribe_meeting.transcriber.CTRANSLATE2_AVAILABLE", False)
+def test_load_whisper_model_falls_back_on_unsupported_compute_type(whisper_model):
+    model = MagicMock()
+    whisper_model.side_effect = [ValueError("int8_float16 not supported"), model]
+    result = load_whisper_model("large-v3", "cuda:1", "int8_float16")
+    assert result == model
+    assert [c.kwargs["compute_type"] for c in whisper_model.call_args_list] == ["int8_float16", "float16"]
+    assert whisper_model.call_args.kwargs["device"] == "cuda"
+    assert whisper_model.call_args.kwargs["device_index"] == 1
+
+@patch("transcribe_meeting.transcriber.CTRANSLATE2_AVAILABLE", False)
+def test_load_whisper_model_does_not_retry_other_errors(whisper_model):
+    whisper_model.side_effect = OSError("model not found")
+    assert load_whisper_model("large-v3", "cuda", "int8_float16") is None
+    whisper_model.assert_called_once()
+
+@patch("transcribe_meeting.transcriber.CTRANSLATE2_AVAILABLE", False)
+@pytest.mark.parametrize("error", [
+    RuntimeError("CUDA failed with error out of memory"),
+    RuntimeError("Unable to open file 'model.bin' in model 'large-v3'"),
+    ValueError("Invalid input features shape"),
+])
+def test_load_whisper_model_does_not_fall_back_on_load_errors(whisper_model, error):
+    whisper_model.side_effect = error
+    assert load_whisper_model("large-v3", "cuda", "int8_float16") is None
+    whisper_model.assert_called_once()
+
+def test_warm_up_consumes_segments():
+    mock_pipeline = MagicMock()
+    segments = MagicMock()
+    segments.__iter__.return_value = iter([])
+    mock_pipeline.transcribe.return_value = (segments, None)
+    assert warm_up(mock_pipeline) is True
+    assert mock_pipeline.transcribe.call_args.kwargs["vad_filter"] is False
+    segments.__iter__.assert_called_once()
+
+    mock_pipeline.transcribe.side_effect = RuntimeError("CUDA error")
+    assert warm_up(mock_pipeline) is False
+
+def test_run_transcription_short_clip_skips_batching():
+    mock_pipeline = MagicMock()
+    mock_pipeline.model.transcribe.return_value = ("segments", None)
+    short_clip = np.zeros(16000 * 5, dtype=np.float32)
+    assert run_transcription(mock_pipeline, short_clip) == ("segments", None)
+    mock_pipeline.transcribe.assert_not_called()
+    assert mock_pipeline.model.transcribe.call_args.kwargs["vad_filter"] is False
+
+    mock_pipeline.transcribe.return_value = ("batched", None)
+    long_clip = np.zeros(16000 * 31, dtype=np.float32)
+    assert run_transcription(mock_pipeline, long_clip) == ("batched", None)